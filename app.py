@@ -6,7 +6,7 @@ Provides web UI for configuration, monitoring, and management
 import os
 import logging
 from datetime import datetime, timedelta
-from error_handling import StandardizedLogger, with_error_handling
+from error_handling import StandardizedLogger, with_error_handling, SizeTrackingRotatingFileHandler
 from config_validation import validate_startup_config, get_validated_config
 try:
     import pytz
@@ -30,7 +30,7 @@ import atexit
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from library_adapters import LibraryAdapterFactory
-from renewal_engine import RenewalEngine
+from renewal_engine import RenewalEngine, invalidate_library_config_cache
 
 # Application version
 __version__ = '0.5.25'
@@ -142,7 +142,7 @@ if not logging.getLogger().handlers:
             # Console handler
             logging.StreamHandler(),
             # File handler with rotation
-            logging.handlers.RotatingFileHandler(
+            SizeTrackingRotatingFileHandler(
                 os.path.join(logs_dir, 'newspaparr.log'),
                 maxBytes=10*1024*1024,  # 10MB
                 backupCount=5
@@ -587,6 +587,8 @@ def add_library():
         
         db.session.add(library)
         db.session.commit()
+        # Renewals cache library configs per type
+        invalidate_library_config_cache()
         
         flash('Library added successfully!', 'success')
         return redirect(url_for('libraries'))
@@ -637,6 +639,8 @@ def edit_library(id):
         library.custom_config = json.dumps(config_data) if config_data else None
         
         db.session.commit()
+        # Renewals cache library configs per type
+        invalidate_library_config_cache()
         
         flash('Library updated successfully!', 'success')
         return redirect(url_for('libraries'))
@@ -656,6 +660,8 @@ def delete_library(id):
     
     db.session.delete(library)
     db.session.commit()
+    # Renewals cache library configs per type
+    invalidate_library_config_cache()
     
     flash('Library deleted successfully!', 'success')
     return redirect(url_for('libraries'))
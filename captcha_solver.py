@@ -7,11 +7,11 @@ import logging
 import time
 import random
 import string
-import subprocess
 from typing import Optional
 from selenium.webdriver.common.by import By
 from error_handling import StandardizedLogger
 from on_demand_proxy import proxy_session, start_proxy_if_needed
+from socks5_proxy import add_credential, remove_credential
 
 logger = StandardizedLogger(__name__)
 
@@ -114,10 +114,10 @@ class CaptchaSolver:
                     proxy_host = os.environ.get('PROXY_HOST')
                     proxy_port = int(os.environ.get('SOCKS5_PROXY_PORT', '3333'))
                     
-                    # Add proxy credentials to SOCKS5 proxy
+                    # Add proxy credentials to SOCKS5 proxy (it runs in this process,
+                    # so they're registered in memory - no subprocess or file round-trip)
                     try:
-                        subprocess.run(['python3', '/app/socks5_proxy.py', 'add', f'{proxy_user}:{proxy_pass}'], 
-                                      capture_output=True, text=True, timeout=5)
+                        add_credential(proxy_user, proxy_pass, persist=False)
                         logger.info("Added single-use SOCKS5 proxy credentials", user=proxy_user)
                     except Exception as e:
                         logger.warning("Could not add SOCKS5 proxy credentials", error=e)
@@ -141,8 +141,7 @@ class CaptchaSolver:
             finally:
                 # Always remove credentials after use (single-use)
                 try:
-                    subprocess.run(['python3', '/app/socks5_proxy.py', 'remove', f'{proxy_user}:{proxy_pass}'], 
-                                  capture_output=True, text=True, timeout=5)
+                    remove_credential(proxy_user, proxy_pass, persist=False)
                     logger.info("Removed single-use proxy credentials", user=proxy_user)
                 except Exception as e:
                     logger.warning("Could not remove proxy credentials", error=e)
@@ -6,6 +6,7 @@ from web pages. Consolidates all date extraction logic in one place.
 import re
 import os
 import logging
+import functools
 from datetime import datetime
 from typing import Optional, Tuple
 import pytz
@@ -13,6 +14,9 @@ from dateutil import parser
 
 logger = logging.getLogger(__name__)
 
+# Visible text of the page, without the markup
+JS_PAGE_TEXT = "return document.body ? (document.body.innerText || document.body.textContent) : '';"
+
 
 class DateExtractor:
     """Centralized date extraction and parsing utilities"""
@@ -43,6 +47,19 @@ class DateExtractor:
         r'expire\s+on\s+([A-Za-z]+ \d{1,2}(?:st|nd|rd|th)?,? \d{4})',
     ]
     
+    # Compiled once at import (same order and flags as the pattern lists above)
+    _DATETIME_RES = [re.compile(pattern, re.IGNORECASE) for pattern in DATETIME_PATTERNS]
+    _DATE_RES = [re.compile(pattern, re.IGNORECASE) for pattern in DATE_PATTERNS]
+    _EXPIRE_RE = re.compile('expire', re.IGNORECASE)
+    _ORDINAL_SUFFIX_RE = re.compile(r'(\d+)(st|nd|rd|th)', re.IGNORECASE)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _local_timezone():
+        """Timezone from the environment as (name, tzinfo), resolved once"""
+        tz_name = os.environ.get('TZ', 'America/New_York')
+        return tz_name, pytz.timezone(tz_name)
+    
     @classmethod
     def extract_expiration(cls, page_source: str, source_type: str = "unknown") -> Tuple[Optional[datetime], Optional[str]]:
         """
@@ -60,34 +77,36 @@ class DateExtractor:
         
         try:
             # Debug: Check if 'expire' exists in page
-            if 'expire' in page_source.lower():
-                expire_index = page_source.lower().index('expire')
+            expire_match = cls._EXPIRE_RE.search(page_source)
+            if expire_match:
+                expire_index = expire_match.start()
                 snippet = page_source[max(0, expire_index-50):min(len(page_source), expire_index+250)]
                 logger.info(f"📋 Found 'expire' text context: ...{snippet}...")
             else:
                 logger.info("📋 No 'expire' text found in page")
             
             # Get timezone from environment
-            tz_name = os.environ.get('TZ', 'America/New_York')
-            local_tz = pytz.timezone(tz_name)
+            tz_name, local_tz = cls._local_timezone()
             
             # Try patterns with both date and time first
-            for pattern in cls.DATETIME_PATTERNS:
-                matches = re.findall(pattern, page_source, re.IGNORECASE)
-                if matches:
-                    logger.info(f"✅ DateTime pattern matched: {pattern[:50]}...")
+            for pattern in cls._DATETIME_RES:
+                # Only the first match is used, so stop scanning there
+                match = pattern.search(page_source)
+                if match:
+                    logger.info(f"✅ DateTime pattern matched: {pattern.pattern[:50]}...")
                     
-                    # Handle patterns that return tuples (date, time) separately
-                    if isinstance(matches[0], tuple):
-                        date_str = f"{matches[0][0]} {matches[0][1]}"
+                    # Handle patterns that capture (date, time) separately
+                    groups = match.groups()
+                    if len(groups) > 1:
+                        date_str = f"{groups[0]} {groups[1]}"
                     else:
-                        date_str = matches[0]
+                        date_str = groups[0]
                     
                     logger.info(f"📅 Extracted datetime string: {date_str}")
                     
                     try:
                         # Clean up the string (remove 'st', 'nd', 'rd', 'th')
-                        cleaned_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str, flags=re.IGNORECASE)
+                        cleaned_str = cls._ORDINAL_SUFFIX_RE.sub(r'\1', date_str)
                         
                         # Parse the date
                         expiration_date = parser.parse(cleaned_str)
@@ -118,16 +137,16 @@ class DateExtractor:
             
             # Try date-only patterns as fallback
             logger.info("📅 No datetime patterns matched, trying date-only patterns...")
-            for pattern in cls.DATE_PATTERNS:
-                matches = re.findall(pattern, page_source, re.IGNORECASE)
-                if matches:
-                    logger.info(f"✅ Date pattern matched: {pattern[:50]}...")
-                    date_str = matches[0]
+            for pattern in cls._DATE_RES:
+                match = pattern.search(page_source)
+                if match:
+                    logger.info(f"✅ Date pattern matched: {pattern.pattern[:50]}...")
+                    date_str = match.group(1)
                     logger.info(f"📅 Extracted date string: {date_str}")
                     
                     try:
                         # Clean up the string
-                        cleaned_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str, flags=re.IGNORECASE)
+                        cleaned_str = cls._ORDINAL_SUFFIX_RE.sub(r'\1', date_str)
                         
                         # Parse the date (will default to midnight)
                         expiration_date = parser.parse(cleaned_str)
@@ -176,6 +195,18 @@ class DateExtractor:
             Tuple of (datetime in UTC, formatted string for display)
         """
         try:
+            # Rendered text is a fraction of the serialized DOM and matches the word-based patterns
+            page_text = driver.execute_script(JS_PAGE_TEXT)
+            if page_text:
+                expiration = cls.extract_expiration(page_text, source_type)
+                if expiration[0]:
+                    return expiration
+                logger.info("📅 No date in page text, falling back to page source")
+        except Exception as e:
+            logger.debug(f"Could not read page text from driver: {e}")
+        
+        try:
+            # Full HTML keeps the span-aware patterns working
             page_source = driver.page_source
             return cls.extract_expiration(page_source, source_type)
         except Exception as e:
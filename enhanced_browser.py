@@ -10,23 +10,73 @@ import logging
 import undetected_chromedriver as uc
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.remote_connection import RemoteConnection
 from selenium_stealth import stealth
 import time
 
 logger = logging.getLogger(__name__)
 
+# urllib3 defaults to a single pooled connection per host, which serializes
+# overlapping WebDriver commands (e.g. waits polling while another call runs)
+WEBDRIVER_POOL_MAXSIZE = 10
+
+
+def configure_connection_pool(maxsize: int = WEBDRIVER_POOL_MAXSIZE):
+    """Raise the WebDriver HTTP client's connection pool size (idempotent)"""
+    original = RemoteConnection._get_connection_manager
+    if getattr(original, '_pool_maxsize', None) == maxsize:
+        return
+    original = getattr(original, '__wrapped__', original)
+    
+    def _get_connection_manager(self):
+        manager = original(self)
+        # Applies to pools created from now on, which is all of them
+        manager.connection_pool_kw['maxsize'] = maxsize
+        # Open an extra connection rather than wait when the pool is busy
+        manager.connection_pool_kw['block'] = False
+        return manager
+    
+    _get_connection_manager.__wrapped__ = original
+    _get_connection_manager._pool_maxsize = maxsize
+    RemoteConnection._get_connection_manager = _get_connection_manager
+
+
+# Applies to uc.Chrome and webdriver.Chrome alike (both use RemoteConnection)
+configure_connection_pool()
+
+# Third-party trackers that slow down page loads without affecting login flows
+BLOCKED_URL_PATTERNS = [
+    "*.doubleclick.net/*",
+    "*.google-analytics.com/*",
+    "*googletagmanager*",
+    "*hotjar*",
+    "*.facebook.net/*",
+]
+
+
+def _build_content_prefs(block_images: bool = False) -> dict:
+    """Chrome profile prefs that skip resource-heavy content"""
+    prefs = {
+        "profile.default_content_setting_values.notifications": 2,
+        "credentials_enable_service": False,
+    }
+    if block_images:
+        prefs["profile.managed_default_content_settings.images"] = 2
+    return prefs
+
 
 class EnhancedBrowser:
     """Enhanced browser with better anti-detection capabilities"""
     
     @classmethod
-    def create_undetected_driver(cls, headless=False, use_proxy=False):
+    def create_undetected_driver(cls, headless=False, use_proxy=False, block_images=False):
         """
         Create an undetected Chrome driver with enhanced anti-detection
         
         Args:
             headless: Whether to run in headless mode
             use_proxy: Whether to use the SOCKS5 proxy for browser traffic
+            block_images: Whether to skip loading images
         """
         logger.info("🚀 Creating enhanced undetected browser...")
         
@@ -61,6 +111,12 @@ class EnhancedBrowser:
         options.add_argument("--enable-features=NetworkService,NetworkServiceInProcess")
         options.add_argument("--force-color-profile=srgb")
         
+        # Skip notifications, password manager and (optionally) images
+        options.add_experimental_option("prefs", _build_content_prefs(block_images))
+        
+        # Return from driver.get() at DOMContentLoaded instead of window.onload
+        options.page_load_strategy = 'eager'
+        
         # Add proxy if requested
         if use_proxy:
             proxy_host = os.environ.get('PROXY_HOST', 'mzaki.mooo.com')
@@ -92,6 +148,9 @@ class EnhancedBrowser:
                 "acceptLanguage": "en-US,en"
             })
             
+            # Block third-party trackers
+            cls._apply_resource_blocking(driver)
+            
             # Additional JavaScript modifications
             cls._apply_anti_detection_scripts(driver, user_agent)
             
@@ -106,10 +165,14 @@ class EnhancedBrowser:
             raise
     
     @classmethod
-    def create_standard_driver(cls, headless=False, use_proxy=False):
+    def create_standard_driver(cls, headless=False, use_proxy=False, block_images=False,
+                               apply_stealth=True):
         """
         Create a standard Chrome driver with stealth applied
         Fallback option if undetected driver fails
+        
+        Args:
+            apply_stealth: Whether to inject selenium-stealth patches (several CDP round-trips)
         """
         logger.info("🚀 Creating enhanced standard browser...")
         
@@ -140,6 +203,12 @@ class EnhancedBrowser:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
+        # Skip notifications, password manager and (optionally) images
+        chrome_options.add_experimental_option("prefs", _build_content_prefs(block_images))
+        
+        # Return from driver.get() at DOMContentLoaded instead of window.onload
+        chrome_options.page_load_strategy = 'eager'
+        
         # Add proxy if requested
         if use_proxy:
             proxy_host = os.environ.get('PROXY_HOST', 'mzaki.mooo.com')
@@ -189,17 +258,23 @@ class EnhancedBrowser:
         except Exception as e:
             logger.warning(f"Could not apply CDP overrides: {e}")
         
-        # Apply stealth
-        stealth(driver,
-            user_agent=user_agent,
-            languages=["en-US", "en"],
-            vendor="Google Inc.",
-            platform="Win32" if "Windows" in user_agent else "MacIntel",
-            webgl_vendor="Intel Inc.",
-            renderer="Intel Iris OpenGL Engine",
-            fix_hairline=True,
-            run_on_insecure_origins=True
-        )
+        # Apply stealth (still on about:blank, so patches cover every new document)
+        if apply_stealth:
+            stealth(driver,
+                user_agent=user_agent,
+                languages=["en-US", "en"],
+                vendor="Google Inc.",
+                platform="Win32" if "Windows" in user_agent else "MacIntel",
+                webgl_vendor="Intel Inc.",
+                renderer="Intel Iris OpenGL Engine",
+                fix_hairline=True,
+                run_on_insecure_origins=True
+            )
+        else:
+            logger.info("Skipping selenium-stealth (apply_stealth disabled)")
+        
+        # Block third-party trackers
+        cls._apply_resource_blocking(driver)
         
         # Additional anti-detection scripts
         cls._apply_anti_detection_scripts(driver, user_agent)
@@ -210,6 +285,16 @@ class EnhancedBrowser:
         logger.info("✅ Enhanced standard browser created successfully")
         return driver
     
+    @staticmethod
+    def _apply_resource_blocking(driver):
+        """Block tracker requests at the network layer via CDP"""
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {"urls": BLOCKED_URL_PATTERNS})
+            logger.debug(f"Blocking {len(BLOCKED_URL_PATTERNS)} tracker URL patterns")
+        except Exception as e:
+            logger.warning(f"Could not apply URL blocking: {e}")
+    
     @staticmethod
     def _apply_anti_detection_scripts(driver, user_agent):
         """Apply additional anti-detection JavaScript modifications"""
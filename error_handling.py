@@ -1,7 +1,11 @@
 """
 Standardized error handling and logging utilities for Newspaparr
 """
+import os
+import stat
 import logging
+import logging.handlers
+import time
 import traceback
 import functools
 from typing import Optional, Callable, Any, Dict
@@ -24,7 +28,7 @@ class StandardizedLogger:
             os.makedirs(logs_dir, exist_ok=True)
             
             # Add file handler
-            file_handler = logging.handlers.RotatingFileHandler(
+            file_handler = SizeTrackingRotatingFileHandler(
                 os.path.join(logs_dir, 'newspaparr.log'),
                 maxBytes=10*1024*1024,  # 10MB
                 backupCount=5
@@ -59,7 +63,9 @@ class StandardizedLogger:
     
     def debug(self, message: str, **kwargs):
         """Log debug message with context"""
-        self.logger.debug(self._format_message(message, **kwargs))
+        # Skip formatting entirely when debug is off (the common case)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(self._format_message(message, **kwargs))
     
     def _format_message(self, message: str, **kwargs) -> str:
         """Format message with context"""
@@ -256,6 +262,78 @@ def setup_logging(debug: bool = False):
     logging.getLogger('PIL').setLevel(logging.WARNING)
 
 
+class SizeTrackingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that keeps a running size count instead of checking
+    the file on every record (stats it again every RESYNC_RECORDS records)"""
+    
+    # Records between fstat() calls, to pick up writes from other processes
+    RESYNC_RECORDS = 100
+    
+    def __init__(self, *args, **kwargs):
+        self._size = None
+        self._records = 0
+        self._regular_file = True
+        super().__init__(*args, **kwargs)
+    
+    def shouldRollover(self, record):
+        if self.maxBytes <= 0:
+            return False
+        if self.stream is None:                 # delay was set...
+            self.stream = self._open()
+        if self._size is None or self._records >= self.RESYNC_RECORDS:
+            st = os.fstat(self.stream.fileno())
+            # Never rollover anything other than regular files (bpo-45401)
+            self._regular_file = stat.S_ISREG(st.st_mode)
+            self._size = st.st_size
+            self._records = 0
+        if not self._regular_file:
+            return False
+        
+        msg_size = len(("%s\n" % self.format(record)).encode(self.stream.encoding or 'utf-8', 'replace'))
+        if self._size + msg_size >= self.maxBytes:
+            return True
+        # Not rolling over, so emit() writes this record to the current file
+        self._size += msg_size
+        self._records += 1
+        return False
+    
+    def doRollover(self):
+        super().doRollover()
+        # New file - size it on the next record
+        self._size = None
+
+
+class RepeatedMessageFilter(logging.Filter):
+    """Drop INFO/DEBUG records repeating the same message within a short interval
+    (polling loops log the same line every tick); warnings and errors always pass"""
+    
+    # Entries kept before the table is cleared, to bound its memory
+    MAX_ENTRIES = 1000
+    
+    def __init__(self, interval: float = 5.0):
+        super().__init__()
+        self.interval = interval
+        self._last_logged = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        
+        key = (record.name, record.levelno, record.msg, record.args)
+        try:
+            now = time.monotonic()
+            last = self._last_logged.get(key)
+            if last is not None and now - last < self.interval:
+                return False
+            if len(self._last_logged) >= self.MAX_ENTRIES:
+                self._last_logged.clear()
+            self._last_logged[key] = now
+        except TypeError:
+            # Unhashable args - can't be compared, so always log
+            pass
+        return True
+
+
 # Convenience functions for backward compatibility
 def get_logger(name: str) -> StandardizedLogger:
     """Get a standardized logger"""
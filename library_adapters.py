@@ -4,7 +4,8 @@ Provides library-agnostic interface for different authentication systems
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, List, Tuple
+from types import MappingProxyType
+from typing import Dict, Optional, List, Tuple, Mapping
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -14,12 +15,59 @@ from selenium.common.exceptions import TimeoutException
 import undetected_chromedriver as uc
 import logging
 import time
+import threading
+import atexit
 from selenium_stealth import stealth
 import os
 from pyvirtualdisplay import Display
 
 logger = logging.getLogger(__name__)
 
+# Fills library login forms in one round-trip; mirrors the Python fallback:
+# first matching field name wins, first matching submit selector is clicked.
+# Returns null (without touching the page) if either field is missing.
+JS_LOGIN = """
+const [username, password, userNames, passNames, submitSelectors] = arguments;
+const byName = names => {
+    for (const name of names) {
+        const el = document.getElementsByName(name)[0];
+        if (el) return el;
+    }
+    return null;
+};
+const user = byName(userNames);
+const pass = byName(passNames);
+if (!user || !pass) return null;
+for (const [field, value] of [[user, username], [pass, password]]) {
+    field.value = value;
+    field.dispatchEvent(new Event('input', {bubbles: true}));
+    field.dispatchEvent(new Event('change', {bubbles: true}));
+}
+for (const selector of submitSelectors) {
+    let button = null;
+    try { button = document.querySelector(selector); } catch (e) { continue; }
+    if (button) { button.click(); break; }
+}
+return true;
+"""
+
+# One Xvfb shared by all renewals, started on first need
+_SHARED_DISPLAY: Optional[Display] = None
+_display_lock = threading.Lock()
+
+
+def _get_shared_display() -> Display:
+    """Start the process-wide virtual display once and return it"""
+    global _SHARED_DISPLAY
+    with _display_lock:
+        if _SHARED_DISPLAY is None:
+            display = Display(visible=0, size=(1920, 1080))
+            display.start()
+            atexit.register(display.stop)
+            _SHARED_DISPLAY = display
+            logger.info(f"Virtual display started: {os.environ.get('DISPLAY')}")
+        return _SHARED_DISPLAY
+
 class LibraryAdapter(ABC):
     """Abstract base class for library adapters"""
     
@@ -27,6 +75,10 @@ class LibraryAdapter(ABC):
         self.config = config
         self.driver = None
         self.wait = None
+        self.short_wait = None
+        # Per-adapter caches; config is fixed for the adapter's lifetime
+        self._url_cache: Dict[str, str] = {}
+        self._library_info: Optional[Dict] = None
     
     @abstractmethod
     def get_library_info(self) -> Dict:
@@ -58,72 +110,82 @@ class LibraryAdapter(ABC):
     def access_wsj(self) -> bool:
         """Access WSJ through library portal"""
         try:
+            # Single URL read up front; every guard below works off this value
             current_url = self.driver.current_url
             logger.info(f"WSJ access check - Current URL: {current_url}")
             
+            on_wsj = "wsj.com" in current_url and "partner.wsj.com" not in current_url
+            on_library_wsj = "wsj.html" in current_url and "idm.oclc.org" in current_url
+            
             # If already on WSJ site, we're done
-            if "wsj.com" in current_url and "partner.wsj.com" not in current_url:
+            if on_wsj:
                 logger.info("Already on WSJ main site")
                 return True
             
-            # If on the library's WSJ page (e.g., loggedin/wsj.html), click "Visit the Wall Street Journal" link
-            if "wsj.html" in current_url and "idm.oclc.org" in current_url:
-                logger.info("On library WSJ page, looking for 'Visit the Wall Street Journal' link")
-                
-                visit_wsj_selectors = [
-                    "//a[contains(text(), 'Visit the Wall Street Journal')]",
-                    "//a[contains(text(), 'Visit The Wall Street Journal')]",
-                    "//a[contains(text(), 'Wall Street Journal')]",
-                    "//a[contains(@href, 'wsj.com')]",
-                    "a[href*='wsj.com']"
-                ]
-                
-                for selector in visit_wsj_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            elements = self.driver.find_elements(By.XPATH, selector)
-                        else:
-                            elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+            # Not on the library's WSJ page - nothing to click (partner page still counts)
+            if not on_library_wsj:
+                return "wsj.com" in current_url
+            
+            # On the library's WSJ page (e.g., loggedin/wsj.html), click "Visit the Wall Street Journal" link
+            logger.info("On library WSJ page, looking for 'Visit the Wall Street Journal' link")
+            
+            visit_wsj_selectors = [
+                "//a[contains(text(), 'Visit the Wall Street Journal')]",
+                "//a[contains(text(), 'Visit The Wall Street Journal')]",
+                "//a[contains(text(), 'Wall Street Journal')]",
+                "//a[contains(@href, 'wsj.com')]",
+                "a[href*='wsj.com']"
+            ]
+            
+            for selector in visit_wsj_selectors:
+                try:
+                    if selector.startswith("//"):
+                        elements = self.driver.find_elements(By.XPATH, selector)
+                    else:
+                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                    
+                    if elements and elements[0].is_displayed():
+                        logger.info(f"Found WSJ link with selector: {selector}")
+                        link_href = elements[0].get_attribute('href')
+                        logger.info(f"WSJ link href: {link_href}")
                         
-                        if elements and elements[0].is_displayed():
-                            logger.info(f"Found WSJ link with selector: {selector}")
-                            link_href = elements[0].get_attribute('href')
-                            logger.info(f"WSJ link href: {link_href}")
+                        try:
+                            # Try clicking with timeout protection
+                            elements[0].click()
+                            logger.info(f"Clicked WSJ link, waiting for navigation...")
                             
-                            try:
-                                # Try clicking with timeout protection
-                                elements[0].click()
-                                logger.info(f"Clicked WSJ link, waiting for navigation...")
-                                
-                                # Wait for navigation with explicit timeout
-                                wait = WebDriverWait(self.driver, 10)
-                                wait.until(lambda driver: driver.current_url != current_url)
-                                
-                                new_url = self.driver.current_url
-                                logger.info(f"After clicking WSJ link, URL: {new_url}")
+                            # Wait for navigation with explicit timeout
+                            self.short_wait.until(lambda driver: driver.current_url != current_url)
+                            
+                            new_url = self.driver.current_url
+                            logger.info(f"After clicking WSJ link, URL: {new_url}")
+                            
+                            # Check if we reached WSJ or partner page
+                            if "wsj.com" in new_url or "partner.wsj.com" in new_url:
+                                return True
                                 
-                                # Check if we reached WSJ or partner page
-                                if "wsj.com" in new_url or "partner.wsj.com" in new_url:
+                        except TimeoutException:
+                            logger.error(f"Timeout waiting for navigation after WSJ link click")
+                            # Try direct navigation as fallback
+                            if link_href:
+                                logger.info(f"Attempting direct navigation to: {link_href}")
+                                self.driver.get(link_href)
+                                try:
+                                    self.short_wait.until(EC.url_contains("wsj.com"))
                                     return True
-                                    
-                            except TimeoutException:
-                                logger.error(f"Timeout waiting for navigation after WSJ link click")
-                                # Try direct navigation as fallback
-                                if link_href:
-                                    logger.info(f"Attempting direct navigation to: {link_href}")
-                                    self.driver.get(link_href)
-                                    time.sleep(2)
-                                    if "wsj.com" in self.driver.current_url:
-                                        return True
-                            except Exception as e:
-                                logger.error(f"Error clicking WSJ link: {str(e)}")
-                                
-                            break
-                    except Exception as e:
-                        logger.debug(f"Selector {selector} failed: {str(e)}")
-                        continue
-                
+                                except TimeoutException:
+                                    logger.warning("Direct navigation did not reach WSJ")
+                        except Exception as e:
+                            logger.error(f"Error clicking WSJ link: {str(e)}")
+                            
+                        break
+                except Exception as e:
+                    logger.debug(f"Selector {selector} failed: {str(e)}")
+                    continue
+            else:
                 logger.warning("Could not find 'Visit the Wall Street Journal' link")
+                # Nothing was clicked, so the URL is unchanged
+                return "wsj.com" in current_url
             
             # Check if we ended up on WSJ or partner site
             final_url = self.driver.current_url
@@ -149,6 +211,10 @@ class LibraryAdapter(ABC):
     
     def get_newspaper_url(self, newspaper_type: str) -> str:
         """Get newspaper-specific URL from library configuration"""
+        cached = self._url_cache.get(newspaper_type)
+        if cached is not None:
+            return cached
+        
         # URLs are now stored directly in the database
         if newspaper_type == 'nyt':
             url = self.config.get('nyt_url', '')
@@ -161,9 +227,67 @@ class LibraryAdapter(ABC):
             logger.info(f"Using stored URL for {newspaper_type}: {url}")
         else:
             logger.error(f"No URL configured for {newspaper_type}")
-            
+        
+        self._url_cache[newspaper_type] = url
         return url
     
+    def _js_login(self, username: str, password: str, username_fields: List[str],
+                  password_fields: List[str], submit_selectors: List[str]) -> bool:
+        """Find, fill and submit the login form in a single execute_script round-trip"""
+        try:
+            return bool(self.driver.execute_script(
+                JS_LOGIN, username, password, username_fields, password_fields, submit_selectors
+            ))
+        except Exception as e:
+            logger.debug(f"JavaScript login failed: {str(e)}")
+            return False
+    
+    def _submit_login_form(self, username: str, password: str, username_fields: List[str],
+                           password_fields: List[str], submit_selectors: List[str]) -> bool:
+        """Fill and submit a library login form, returning False if fields are missing"""
+        if self._js_login(username, password, username_fields, password_fields, submit_selectors):
+            logger.debug("Login form filled via JavaScript")
+            return True
+        
+        # Fall back to WebDriver element interaction
+        username_field = None
+        for field_name in username_fields:
+            try:
+                username_field = self.driver.find_element(By.NAME, field_name)
+                break
+            except:
+                continue
+        
+        if not username_field:
+            logger.error("Could not find username field")
+            return False
+        
+        username_field.send_keys(username)
+        
+        password_field = None
+        for field_name in password_fields:
+            try:
+                password_field = self.driver.find_element(By.NAME, field_name)
+                break
+            except:
+                continue
+        
+        if not password_field:
+            logger.error("Could not find password field")
+            return False
+            
+        password_field.send_keys(password)
+        
+        for selector in submit_selectors:
+            try:
+                submit_button = self.driver.find_element(By.CSS_SELECTOR, selector)
+                submit_button.click()
+                break
+            except:
+                continue
+        
+        return True
+    
     def setup_driver(self, headless: bool = False, newspaper_type: str = 'nyt') -> webdriver.Chrome:
         """Setup WebDriver with enhanced anti-detection capabilities"""
         
@@ -172,14 +296,19 @@ class LibraryAdapter(ABC):
         # Check if we need proxy for browser (e.g., if DataDome is blocking direct connections)
         use_browser_proxy = os.environ.get('USE_BROWSER_PROXY', 'false').lower() == 'true'
         
+        # Images are skipped to speed up page loads; WSJ pages keep them by default
+        block_images = self.config.get('block_images', newspaper_type != 'wsj')
+        
+        # undetected-chromedriver patches automation surfaces itself; selenium-stealth
+        # is only applied to the non-uc fallbacks unless disabled here
+        apply_stealth = self.config.get('apply_stealth', True)
+        
         # Check if we're running on a server (no display)
+        # (the shared display sets DISPLAY, so later renewals reuse it)
         display = None
         if os.environ.get('DISPLAY') is None and not headless:
             logger.info("No display detected, starting virtual display for GUI mode")
-            display = Display(visible=0, size=(1920, 1080))
-            display.start()
-            self.virtual_display = display  # Store reference for cleanup
-            logger.info(f"Virtual display started: {os.environ.get('DISPLAY')}")
+            display = _get_shared_display()
         
         # Try enhanced browser first
         try:
@@ -188,7 +317,8 @@ class LibraryAdapter(ABC):
             # Use enhanced undetected driver with better anti-detection
             self.driver = EnhancedBrowser.create_undetected_driver(
                 headless=(headless and display is None),
-                use_proxy=use_browser_proxy
+                use_proxy=use_browser_proxy,
+                block_images=block_images
             )
             
             logger.info(f"✅ Enhanced undetected browser created for {newspaper_type.upper()}")
@@ -202,7 +332,9 @@ class LibraryAdapter(ABC):
                 # Try standard driver with stealth
                 self.driver = EnhancedBrowser.create_standard_driver(
                     headless=(headless and display is None),
-                    use_proxy=use_browser_proxy
+                    use_proxy=use_browser_proxy,
+                    block_images=block_images,
+                    apply_stealth=apply_stealth
                 )
                 
                 logger.info(f"✅ Enhanced standard browser created for {newspaper_type.upper()}")
@@ -210,9 +342,9 @@ class LibraryAdapter(ABC):
             except Exception as e2:
                 logger.error(f"Failed to create enhanced standard driver: {str(e2)}, using legacy fallback")
                 # Final fallback to legacy driver
-                return self._setup_regular_driver(headless)
+                return self._setup_regular_driver(headless, apply_stealth=apply_stealth)
         
-        self.wait = WebDriverWait(self.driver, 30)
+        self._create_waits()
         
         if use_browser_proxy:
             logger.info("✅ Browser ready with SOCKS5 proxy connection")
@@ -221,7 +353,7 @@ class LibraryAdapter(ABC):
         
         return self.driver
     
-    def _setup_regular_driver(self, headless: bool = False) -> webdriver.Chrome:
+    def _setup_regular_driver(self, headless: bool = False, apply_stealth: bool = True) -> webdriver.Chrome:
         """Setup regular ChromeDriver (for WSJ or fallback)"""
         chrome_options = Options()
         
@@ -250,6 +382,9 @@ class LibraryAdapter(ABC):
         chrome_options.add_argument("--disable-web-security")
         chrome_options.add_argument("--allow-running-insecure-content")
         
+        # Return from driver.get() at DOMContentLoaded instead of window.onload
+        chrome_options.page_load_strategy = 'eager'
+        
         # Use Chromium
         chrome_options.binary_location = "/usr/bin/chromium"
         
@@ -269,36 +404,40 @@ class LibraryAdapter(ABC):
         })
         
         # Apply selenium-stealth for additional anti-detection
-        logger.info("Applying selenium-stealth to regular driver...")
-        
-        # Extract platform from user agent
-        platform = "Win32"
-            
-        stealth(self.driver,
-            user_agent=user_agent,
-            languages=["en-US", "en"],
-            vendor="Google Inc.",
-            platform=platform,
-            webgl_vendor="Intel Inc.",
-            renderer="Intel Iris OpenGL Engine",
-            fix_hairline=True,
-        )
-        logger.info("✅ Selenium-stealth applied to regular driver")
+        if apply_stealth:
+            logger.info("Applying selenium-stealth to regular driver...")
+            
+            # Extract platform from user agent
+            platform = "Win32"
+                
+            stealth(self.driver,
+                user_agent=user_agent,
+                languages=["en-US", "en"],
+                vendor="Google Inc.",
+                platform=platform,
+                webgl_vendor="Intel Inc.",
+                renderer="Intel Iris OpenGL Engine",
+                fix_hairline=True,
+            )
+            logger.info("✅ Selenium-stealth applied to regular driver")
+        else:
+            logger.info("Skipping selenium-stealth for regular driver (apply_stealth disabled)")
         
+        self._create_waits()
         return self.driver
     
+    def _create_waits(self):
+        """Create reusable waits for the current driver"""
+        self.wait = WebDriverWait(self.driver, 30)
+        self.short_wait = WebDriverWait(self.driver, 10)
+    
     def cleanup_driver(self):
-        """Clean up WebDriver resources"""
+        """Clean up WebDriver resources (the shared virtual display is stopped at exit)"""
         if self.driver:
             self.driver.quit()
             self.driver = None
             self.wait = None
-        
-        # Clean up virtual display if we started one
-        if hasattr(self, 'virtual_display') and self.virtual_display:
-            logger.info("Stopping virtual display")
-            self.virtual_display.stop()
-            self.virtual_display = None
+            self.short_wait = None
 
 class GenericOCLCAdapter(LibraryAdapter):
     """Generic adapter for OCLC WorldCat libraries"""
@@ -309,13 +448,15 @@ class GenericOCLCAdapter(LibraryAdapter):
         self.library_name = config.get('library_name', 'OCLC Library')
     
     def get_library_info(self) -> Dict:
-        return {
-            "name": self.library_name,
-            "type": "OCLC WorldCat",
-            "base_url": f"https://{self.library_domain}",
-            "renewal_hours": self.config.get('renewal_hours', 72),
-            "supports_multiple_accounts": True
-        }
+        if self._library_info is None:
+            self._library_info = {
+                "name": self.library_name,
+                "type": "OCLC WorldCat",
+                "base_url": f"https://{self.library_domain}",
+                "renewal_hours": self.config.get('renewal_hours', 72),
+                "supports_multiple_accounts": True
+            }
+        return self._library_info
     
     def authenticate(self, username: str, password: str) -> bool:
         """Generic OCLC authentication"""
@@ -337,34 +478,6 @@ class GenericOCLCAdapter(LibraryAdapter):
             possible_username_fields = ["user", "username", "barcode", "cardnumber"]
             possible_password_fields = ["pass", "password", "pin"]
             
-            username_field = None
-            for field_name in possible_username_fields:
-                try:
-                    username_field = self.driver.find_element(By.NAME, field_name)
-                    break
-                except:
-                    continue
-            
-            if not username_field:
-                logger.error("Could not find username field")
-                return False
-            
-            username_field.send_keys(username)
-            
-            password_field = None
-            for field_name in possible_password_fields:
-                try:
-                    password_field = self.driver.find_element(By.NAME, field_name)
-                    break
-                except:
-                    continue
-            
-            if not password_field:
-                logger.error("Could not find password field")
-                return False
-                
-            password_field.send_keys(password)
-            
             submit_selectors = [
                 "input[type='submit']",
                 "button[type='submit']",
@@ -372,13 +485,9 @@ class GenericOCLCAdapter(LibraryAdapter):
                 "#submit"
             ]
             
-            for selector in submit_selectors:
-                try:
-                    submit_button = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    submit_button.click()
-                    break
-                except:
-                    continue
+            if not self._submit_login_form(username, password, possible_username_fields,
+                                           possible_password_fields, submit_selectors):
+                return False
             
             time.sleep(5)
             
@@ -430,13 +539,15 @@ class CustomLibraryAdapter(LibraryAdapter):
         self.login_url = config.get('login_url')
     
     def get_library_info(self) -> Dict:
-        return {
-            "name": self.library_name,
-            "type": "Custom",
-            "base_url": self.login_url or f"https://{self.library_domain}" if self.library_domain else None,
-            "renewal_hours": self.config.get('renewal_hours', 72),
-            "supports_multiple_accounts": True
-        }
+        if self._library_info is None:
+            self._library_info = {
+                "name": self.library_name,
+                "type": "Custom",
+                "base_url": self.login_url or f"https://{self.library_domain}" if self.library_domain else None,
+                "renewal_hours": self.config.get('renewal_hours', 72),
+                "supports_multiple_accounts": True
+            }
+        return self._library_info
     
     def authenticate(self, username: str, password: str) -> bool:
         """Custom library authentication with dynamic URL generation"""
@@ -459,34 +570,6 @@ class CustomLibraryAdapter(LibraryAdapter):
             possible_username_fields = ["user", "username", "barcode", "cardnumber", "email"]
             possible_password_fields = ["pass", "password", "pin"]
             
-            username_field = None
-            for field_name in possible_username_fields:
-                try:
-                    username_field = self.driver.find_element(By.NAME, field_name)
-                    break
-                except:
-                    continue
-            
-            if not username_field:
-                logger.error("Could not find username field")
-                return False
-            
-            username_field.send_keys(username)
-            
-            password_field = None
-            for field_name in possible_password_fields:
-                try:
-                    password_field = self.driver.find_element(By.NAME, field_name)
-                    break
-                except:
-                    continue
-            
-            if not password_field:
-                logger.error("Could not find password field")
-                return False
-                
-            password_field.send_keys(password)
-            
             # Try to find and click submit button
             submit_selectors = [
                 "input[type='submit']",
@@ -497,13 +580,9 @@ class CustomLibraryAdapter(LibraryAdapter):
                 "button:contains('Sign in')"
             ]
             
-            for selector in submit_selectors:
-                try:
-                    submit_button = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    submit_button.click()
-                    break
-                except:
-                    continue
+            if not self._submit_login_form(username, password, possible_username_fields,
+                                           possible_password_fields, submit_selectors):
+                return False
             
             time.sleep(5)
             
@@ -548,15 +627,17 @@ class CustomLibraryAdapter(LibraryAdapter):
 class LibraryAdapterFactory:
     """Factory for creating library adapters"""
     
-    @staticmethod
-    def create_adapter(library_type: str, config: Dict) -> LibraryAdapter:
+    # Read-only registry of library type -> adapter class
+    _ADAPTERS: Mapping[str, type] = MappingProxyType({
+        "generic_oclc": GenericOCLCAdapter,
+        "custom": CustomLibraryAdapter,
+    })
+    
+    @classmethod
+    def create_adapter(cls, library_type: str, config: Dict) -> LibraryAdapter:
         """Create appropriate library adapter"""
-        adapters = {
-            "generic_oclc": GenericOCLCAdapter,
-            "custom": CustomLibraryAdapter,
-        }
-        
-        if library_type not in adapters:
+        adapter_cls = cls._ADAPTERS.get(library_type)
+        if adapter_cls is None:
             raise ValueError(f"Unknown library type: {library_type}")
         
-        return adapters[library_type](config)
+        return adapter_cls(config)
@@ -3,6 +3,7 @@ On-demand SOCKS5 proxy server for CAPTCHA solving
 Only starts when needed and automatically shuts down after use
 """
 import asyncio
+import functools
 import logging
 import threading
 import time
@@ -10,7 +11,7 @@ import os
 import signal
 from typing import Optional
 from contextlib import contextmanager
-from socks5_proxy import SOCKS5Server
+from socks5_proxy import SOCKS5Server, LISTEN_OPTIONS, new_event_loop
 from error_handling import StandardizedLogger
 
 logger = StandardizedLogger(__name__)
@@ -25,13 +26,21 @@ class OnDemandProxyManager:
         self.server = None
         self.server_thread = None
         self.loop = None
-        self.is_running = False
-        self.shutdown_timer = None
+        # Written by the server thread, read from any thread
+        self._running = threading.Event()
         self.auto_shutdown_delay = 300  # 5 minutes of inactivity
+        # Single watcher thread sleeps until this monotonic deadline
+        self._deadline_cv = threading.Condition()
+        self._deadline = None
+        self._watcher_thread = None
+        # Set by the server thread once listening (or once startup has failed)
+        self._started_event = threading.Event()
+        self._start_error = None
+        self._server_task = None
         
     def start_proxy(self) -> bool:
         """Start the proxy server if not already running"""
-        if self.is_running:
+        if self._running.is_set():
             logger.info("Proxy already running", port=self.port)
             self._reset_shutdown_timer()
             return True
@@ -40,99 +49,165 @@ class OnDemandProxyManager:
             logger.info("Starting on-demand SOCKS5 proxy", host=self.host, port=self.port)
             
             # Start server in separate thread
+            self._started_event.clear()
+            self._start_error = None
             self.server_thread = threading.Thread(target=self._run_server, daemon=True)
             self.server_thread.start()
             
             # Wait for server to start
             start_timeout = 10
-            for _ in range(start_timeout * 10):  # Check every 100ms
-                if self.is_running:
-                    logger.info("SOCKS5 proxy started successfully", port=self.port)
-                    self._reset_shutdown_timer()
-                    return True
-                time.sleep(0.1)
+            if not self._started_event.wait(timeout=start_timeout):
+                logger.error("Proxy failed to start within timeout")
+                return False
             
-            logger.error("Proxy failed to start within timeout")
-            return False
+            if not self._running.is_set():
+                logger.error("Proxy failed to start", error=self._start_error)
+                return False
+            
+            logger.info("SOCKS5 proxy started successfully", port=self.port)
+            return True
             
         except Exception as e:
             logger.error("Failed to start proxy", error=e)
             return False
     
-    def stop_proxy(self):
-        """Stop the proxy server"""
-        if not self.is_running:
+    def stop_proxy(self, graceful: bool = True):
+        """
+        Stop the proxy server
+        
+        Args:
+            graceful: Wait for the server to close and its thread to exit.
+                      Pass False on process termination - the daemon thread
+                      dies with the process, so there is nothing to wait for.
+        """
+        if not self._running.is_set():
             return
         
-        logger.info("Stopping SOCKS5 proxy", port=self.port)
+        logger.info("Stopping SOCKS5 proxy", port=self.port, graceful=graceful)
         
         try:
-            # Cancel shutdown timer
-            if self.shutdown_timer:
-                self.shutdown_timer.cancel()
-                self.shutdown_timer = None
+            # Wake the shutdown watcher so it exits
+            with self._deadline_cv:
+                self._deadline = None
+                self._deadline_cv.notify()
             
-            # Stop the server
-            if self.loop and self.server:
-                self.loop.call_soon_threadsafe(self.server.close)
+            if not graceful:
+                # Schedule the shutdown (stopping our loop once it's done) without waiting on it
+                if self.loop and self.server and self.loop.is_running():
+                    loop = self.loop
+                    future = asyncio.run_coroutine_threadsafe(self.stop_proxy_async(), loop)
+                    future.add_done_callback(lambda _: loop.call_soon_threadsafe(loop.stop))
+                self._running.clear()
+                logger.info("SOCKS5 proxy stop requested")
+                return
             
-            self.is_running = False
+            # Close the server on its own loop and wait for its sockets to be released
+            if self.loop and self.server and self.loop.is_running():
+                future = asyncio.run_coroutine_threadsafe(self.stop_proxy_async(), self.loop)
+                future.result(timeout=5)
             
-            # Wait for thread to finish
+            # Stop the loop, ending the server thread; serve_forever() has
+            # already returned, so this is quick
             if self.server_thread and self.server_thread.is_alive():
-                self.server_thread.join(timeout=5)
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.server_thread.join(timeout=1)
             
             logger.info("SOCKS5 proxy stopped")
             
         except Exception as e:
             logger.error("Error stopping proxy", error=e)
     
+    async def start_proxy_async(self):
+        """Start the server as a task on the running event loop"""
+        proxy_server = SOCKS5Server(self.host, self.port)
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(
+            proxy_server.handle_client,
+            self.host,
+            self.port,
+            **LISTEN_OPTIONS
+        )
+        self._server_task = asyncio.create_task(self._serve())
+        self._running.set()
+        logger.info("SOCKS5 server listening", host=self.host, port=self.port)
+        self._start_shutdown_watcher()
+    
+    async def stop_proxy_async(self):
+        """Close the server and wait for its task to finish (runs on the server's loop)"""
+        self.server.close()
+        await self.server.wait_closed()
+        if self._server_task:
+            await self._server_task
+            self._server_task = None
+    
+    async def _serve(self):
+        """Serve connections until the server is closed"""
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        except asyncio.CancelledError:
+            # Raised when stop_proxy_async() closes the server
+            pass
+        finally:
+            self._running.clear()
+    
     def _run_server(self):
-        """Run the server in async event loop"""
+        """Run the server on a dedicated thread and event loop"""
+        loop = None
         try:
-            # Create new event loop for this thread
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-            
-            # Start server
-            proxy_server = SOCKS5Server(self.host, self.port)
+            # Create new event loop for this thread (uvloop when installed)
+            loop = new_event_loop()
+            asyncio.set_event_loop(loop)
             
-            async def start_server():
-                self.server = await asyncio.start_server(
-                    proxy_server.handle_client,
-                    self.host,
-                    self.port
-                )
-                self.is_running = True
-                logger.info("SOCKS5 server listening", host=self.host, port=self.port)
-                
-                async with self.server:
-                    await self.server.serve_forever()
+            loop.run_until_complete(self.start_proxy_async())
+            self._started_event.set()
             
-            # Run server
-            self.loop.run_until_complete(start_server())
+            # Run server until stop_proxy() stops the loop
+            loop.run_forever()
             
         except Exception as e:
             logger.error("Server thread error", error=e)
-            self.is_running = False
+            self._start_error = e
         finally:
-            if self.loop:
-                self.loop.close()
-            self.is_running = False
+            if loop:
+                loop.close()
+            self._running.clear()
+            # Wake a waiting start_proxy if startup never completed
+            self._started_event.set()
+    
+    def _start_shutdown_watcher(self):
+        """Start the thread that enforces the inactivity deadline"""
+        self._reset_shutdown_timer()
+        self._watcher_thread = threading.Thread(target=self._watch_shutdown_deadline, daemon=True)
+        self._watcher_thread.start()
+    
+    def _watch_shutdown_deadline(self):
+        """Sleep until the inactivity deadline passes, then shut down"""
+        with self._deadline_cv:
+            # Recompute from the monotonic clock after every wake-up, so
+            # extends and spurious wake-ups never shift the baseline
+            while (remaining := self._remaining_before_shutdown()) is not None and remaining > 0:
+                self._deadline_cv.wait(timeout=remaining)
+            if remaining is None:
+                # Stopped explicitly
+                return
+            # Claim the shutdown under the lock, then stop outside it so
+            # extend_session() callers don't block on the server teardown
+            self._deadline = None
+        self._auto_shutdown()
+    
+    def _remaining_before_shutdown(self) -> Optional[float]:
+        """Seconds left until the deadline, or None once the proxy is stopping (caller holds the lock)"""
+        if not self._running.is_set() or self._deadline is None:
+            return None
+        return self._deadline - time.monotonic()
     
     def _reset_shutdown_timer(self):
-        """Reset the auto-shutdown timer"""
-        # Cancel existing timer
-        if self.shutdown_timer:
-            self.shutdown_timer.cancel()
-        
-        # Start new timer
-        self.shutdown_timer = threading.Timer(
-            self.auto_shutdown_delay, 
-            self._auto_shutdown
-        )
-        self.shutdown_timer.start()
-        logger.debug(f"Auto-shutdown timer set for {self.auto_shutdown_delay}s")
+        """Reset the auto-shutdown deadline"""
+        with self._deadline_cv:
+            self._deadline = time.monotonic() + self.auto_shutdown_delay
+            self._deadline_cv.notify()
+        logger.debug("Auto-shutdown timer set", delay=self.auto_shutdown_delay)
     
     def _auto_shutdown(self):
         """Automatically shutdown proxy after inactivity"""
@@ -142,65 +217,56 @@ class OnDemandProxyManager:
     
     def is_proxy_running(self) -> bool:
         """Check if proxy is currently running"""
-        return self.is_running
+        return self._running.is_set()
     
     def extend_session(self):
         """Extend the proxy session (reset shutdown timer)"""
-        if self.is_running:
+        # Same lock as the watcher, so the running check and the deadline
+        # update are atomic; an extend after a claimed shutdown is simply
+        # lost and the next start_proxy() brings the server back
+        with self._deadline_cv:
+            if not self._running.is_set():
+                return
             self._reset_shutdown_timer()
-            logger.debug("Proxy session extended")
+        logger.debug("Proxy session extended")
+
+
+# Always bind to 0.0.0.0 for internal proxy server
+# PROXY_HOST is used for external access by CAPTCHA services
+PROXY_BIND_HOST = '0.0.0.0'
+PROXY_PORT = int(os.environ.get('SOCKS5_PROXY_PORT', '3333'))
 
 
 # Global proxy manager instance
-_proxy_manager = None
+_proxy_manager = OnDemandProxyManager(PROXY_BIND_HOST, PROXY_PORT)
 
 
 def get_proxy_manager() -> OnDemandProxyManager:
     """Get the global proxy manager instance"""
-    global _proxy_manager
-    if _proxy_manager is None:
-        # Always bind to 0.0.0.0 for internal proxy server
-        # PROXY_HOST is used for external access by CAPTCHA services
-        proxy_host = '0.0.0.0'
-        proxy_port = int(os.environ.get('SOCKS5_PROXY_PORT', '3333'))
-        _proxy_manager = OnDemandProxyManager(proxy_host, proxy_port)
     return _proxy_manager
 
 
 @contextmanager
 def proxy_session():
     """Context manager for proxy sessions"""
-    manager = get_proxy_manager()
-    
     try:
         # Start proxy
-        if not manager.start_proxy():
+        if not _proxy_manager.start_proxy():
             raise RuntimeError("Failed to start proxy server")
         
-        yield manager
+        yield _proxy_manager
         
     finally:
         # Extend session instead of immediately stopping
         # This allows reuse if another CAPTCHA comes quickly
-        manager.extend_session()
-
-
-def start_proxy_if_needed() -> bool:
-    """Start proxy if CAPTCHA solving is needed"""
-    manager = get_proxy_manager()
-    return manager.start_proxy()
+        _proxy_manager.extend_session()
 
 
-def stop_proxy_now():
-    """Immediately stop the proxy (emergency shutdown)"""
-    manager = get_proxy_manager()
-    manager.stop_proxy()
-
-
-def is_proxy_available() -> bool:
-    """Check if proxy is available"""
-    manager = get_proxy_manager()
-    return manager.is_proxy_running()
+# Module-level helpers bound straight to the singleton (no wrapper call per use)
+start_proxy_if_needed = _proxy_manager.start_proxy
+# Emergency shutdown (signal handlers) - don't block waiting for the server thread
+stop_proxy_now = functools.partial(_proxy_manager.stop_proxy, graceful=False)
+is_proxy_available = _proxy_manager.is_proxy_running
 
 
 # Cleanup on process termination
@@ -210,6 +276,23 @@ def _cleanup_handler(signum, frame):
     stop_proxy_now()
 
 
+def _register_cleanup_handlers():
+    """Register signal handlers once, only from the main thread and without clobbering existing ones"""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            current = signal.getsignal(signum)
+            if current is _cleanup_handler:
+                continue
+            # Leave handlers installed by gunicorn or other lifecycle managers alone
+            if current not in (signal.SIG_DFL, signal.SIG_IGN, None, signal.default_int_handler):
+                continue
+            signal.signal(signum, _cleanup_handler)
+        except (ValueError, OSError) as e:
+            logger.debug("Could not register signal handler", signal=signum, error=e)
+
+
 # Register cleanup handlers
-signal.signal(signal.SIGTERM, _cleanup_handler)
-signal.signal(signal.SIGINT, _cleanup_handler)
\ No newline at end of file
+_register_cleanup_handlers()
\ No newline at end of file
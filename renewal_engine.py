@@ -7,7 +7,16 @@ import os
 import time
 import json
 import re
+import base64
+import functools
+import queue
+import shutil
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from typing import Dict, Optional, Tuple, List
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -18,21 +27,293 @@ from library_adapters import LibraryAdapterFactory
 from captcha_solver import CaptchaSolver
 from error_handling import StandardizedLogger
 from browser_config import get_capsolver_user_agent
-from state_detector import StateDetector, check_current_state
+from state_detector import StateDetector, check_current_state, CAPTCHA_SELECTORS_CSS
 from date_extractor import DateExtractor
 
 logger = StandardizedLogger(__name__)
 
+# app imports this module, so while app is still initializing this import fails
+# and the model is bound on first use instead (see _library_config_model)
+try:
+    from app import LibraryConfig  # noqa
+except ImportError:
+    LibraryConfig = None
+
+# Login field selectors, joined once so each lookup is a single find_elements call
+_USERNAME_SELECTORS = (
+    "input[type='email']",
+    "input[name='username']",
+    "input[name='email']",
+    "input[id='email']",
+    "input[id='username']",
+    "input[name='emailOrUsername']",  # WSJ specific
+    "input[id='emailOrUsername']",    # WSJ specific
+    "#email-input",
+    "#username-input",
+    "[data-testid='email']",
+    "[data-testid='username']"
+)
+USERNAME_SELECTORS_CSS = ", ".join(_USERNAME_SELECTORS)
+# Username-only flow sticks to the plain input selectors
+USERNAME_FLOW_SELECTORS_CSS = ", ".join(_USERNAME_SELECTORS[:7])
+
+PASSWORD_SELECTORS_CSS = ", ".join((
+    "input[type='password']",
+    "input[name='password']",
+    "input[id='password']",
+    "#password-input",
+    "[data-testid='password']"
+))
+
+def _library_config_model():
+    """LibraryConfig model, imported once app has finished initializing"""
+    global LibraryConfig
+    if LibraryConfig is None:
+        from app import LibraryConfig
+    return LibraryConfig
+
+
+@functools.lru_cache(maxsize=1)
+def _app_log_models():
+    """(app, db, RenewalLog), imported once app has finished initializing"""
+    from app import app, db, RenewalLog
+    return app, db, RenewalLog
+
+
+@functools.lru_cache(maxsize=64)
+def _get_library_config(library_type: str) -> Optional[SimpleNamespace]:
+    """Library configuration for a type, queried once per process (None if missing)
+    
+    Returns a plain snapshot rather than the ORM object so it stays usable
+    outside the session it was loaded in. Call invalidate_library_config_cache()
+    whenever library configurations change.
+    """
+    library_config = _library_config_model().query.filter_by(type=library_type).first()
+    if not library_config:
+        return None
+    return SimpleNamespace(
+        name=library_config.name,
+        custom_config=library_config.custom_config,
+        default_renewal_hours=library_config.default_renewal_hours,
+        nyt_url=library_config.nyt_url,
+        wsj_url=library_config.wsj_url
+    )
+
+
+# Screenshot/debug files are written by one background thread so renewals
+# never block on disk I/O; renew_account waits for its own files before returning
+_SCREENSHOT_QUEUE = queue.Queue(maxsize=256)
+_screenshot_writer = None
+_screenshot_writer_lock = threading.Lock()
+
+
+def _screenshot_writer_loop():
+    """Write queued (path, data, done) entries in binary mode (str is encoded to UTF-8 first)"""
+    while True:
+        path, data, done = _SCREENSHOT_QUEUE.get()
+        try:
+            # One encode and a raw write instead of the text layer's buffered codec
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            with open(path, 'wb') as f:
+                f.write(data)
+        except Exception as e:
+            logger.error(f"Error writing {os.path.basename(path)}: {str(e)}")
+        finally:
+            done.set()
+
+
+def _queue_screenshot_write(path: str, data) -> threading.Event:
+    """Queue a file for the background writer, starting it on first use (the event is set once written)"""
+    global _screenshot_writer
+    if _screenshot_writer is None:
+        with _screenshot_writer_lock:
+            if _screenshot_writer is None:
+                _screenshot_writer = threading.Thread(target=_screenshot_writer_loop, daemon=True)
+                _screenshot_writer.start()
+    done = threading.Event()
+    _SCREENSHOT_QUEUE.put((path, data, done))
+    return done
+
+
+def invalidate_library_config_cache():
+    """Drop cached library configurations (after a library is added, edited or deleted)"""
+    _get_library_config.cache_clear()
+
+
+# URL classification for the login loop (case-insensitive, one scan each)
+_LOGIN_URL_RE = re.compile(r'login|signin|auth|sso', re.I)
+_REGISTRATION_URL_RE = re.compile(r'register|create|join', re.I)
+_NEWSPAPER_DOMAIN = {'nyt': 'nytimes.com', 'wsj': 'wsj.com'}
+_LIBRARY_PROXY_DOMAIN = "idm.oclc.org"
+
+# Pick the first visible (and optionally writable) match in-browser: one round-trip
+# instead of is_displayed()/get_attribute() calls per candidate
+JS_FIRST_VISIBLE = """
+const els = document.querySelectorAll(arguments[0]);
+for (const e of els) {
+    const s = getComputedStyle(e);
+    if (s.display === 'none' || s.visibility === 'hidden' || e.getClientRects().length === 0) continue;
+    if (arguments[1] && e.hasAttribute('readonly')) continue;
+    return e;
+}
+return null;
+"""
+
+# Gift code redemption URL fragments
+_GIFT_CODE_INDICATORS = (
+    'subscription/redeem',
+    'gift_code=',
+    'giftcode=',
+    'redeem?',
+    'activation?code=',
+    'promo_code=',
+    'pass_code=',
+    'enter-redemption-code',  # WSJ redemption code URL pattern
+    'partner.wsj.com/p/'      # WSJ partner redemption URL pattern
+)
+# ...matched case-insensitively in one pass
+_GIFT_CODE_URL_RE = re.compile("|".join(map(re.escape, _GIFT_CODE_INDICATORS)), re.I)
+
+# Try ('css' | 'xpath' | 'text', expression) selectors in priority order in-browser and
+# return [element, index] for the first visible, enabled match (or null). 'text'
+# matches buttons whose first text node contains the expression, like XPath's
+# //button[contains(text(), ...)] but through the CSS engine
+JS_FIRST_CLICKABLE = """
+const usable = e => {
+    const s = getComputedStyle(e);
+    return s.display !== 'none' && s.visibility !== 'hidden' && e.getClientRects().length > 0 && !e.disabled;
+};
+const selectors = arguments[0];
+for (let i = 0; i < selectors.length; i++) {
+    const [kind, expr] = selectors[i];
+    let els = [];
+    if (kind === 'css') {
+        els = document.querySelectorAll(expr);
+    } else if (kind === 'text') {
+        els = Array.prototype.filter.call(document.querySelectorAll('button'), e => {
+            const t = Array.prototype.find.call(e.childNodes, n => n.nodeType === Node.TEXT_NODE);
+            return t && t.data.includes(expr);
+        });
+    } else {
+        const snap = document.evaluate(expr, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (let j = 0; j < snap.snapshotLength; j++) els.push(snap.snapshotItem(j));
+    }
+    for (const e of els) {
+        if (usable(e)) return [e, i];
+    }
+}
+return null;
+"""
+
+_SUBMIT_BUTTON_SELECTORS = (
+    ('css', "button[type='submit']"),
+    ('css', "input[type='submit']"),
+    ('text', "Sign in"),
+    ('text', "Log in"),
+    ('text', "Login"),
+    ('css', "[data-testid*='submit']"),
+    ('css', "[data-testid*='signin']"),
+    ('css', "form button"),
+    ('css', ".submit-button")
+)
+
+# Gift code redemption page buttons
+_REDEEM_BUTTON_SELECTORS = (
+    ('css', "button[type='submit']"),
+    ('css', "input[type='submit']"),
+    ('text', "Redeem"),
+    ('text', "Submit"),
+    ('text', "Continue"),
+    ('text', "Get Access"),
+    ('text', "Activate"),
+    ('css', "[data-testid*='redeem']"),
+    ('css', "[data-testid*='submit']"),
+    ('css', ".redeem-button"),
+    ('css', ".submit-button")
+)
+
+# Library portal links through to each newspaper
+_NEWSPAPER_ACCESS_LINK_SELECTORS = {
+    'wsj': (
+        ('xpath', "//a[contains(text(), 'Visit the Wall Street Journal')]"),
+        ('xpath', "//a[contains(text(), 'Visit The Wall Street Journal')]"),
+        ('xpath', "//a[contains(text(), 'Wall Street Journal')]"),
+        ('xpath', "//a[contains(text(), 'Access Wall Street Journal')]"),
+        ('xpath', "//a[contains(text(), 'Go to Wall Street Journal')]"),
+        ('xpath', "//a[contains(@href, 'wsj.com')]"),
+        ('css', "a[href*='wsj.com']"),
+        ('xpath', "//a[contains(@href, '/wsj')]")
+    ),
+    'nyt': (
+        ('xpath', "//a[contains(text(), 'Visit the New York Times')]"),
+        ('xpath', "//a[contains(text(), 'Visit The New York Times')]"),
+        ('xpath', "//a[contains(text(), 'New York Times')]"),
+        ('xpath', "//a[contains(text(), 'Access New York Times')]"),
+        ('xpath', "//a[contains(text(), 'Go to New York Times')]"),
+        ('xpath', "//a[contains(text(), 'NYTimes')]"),
+        ('xpath', "//a[contains(@href, 'nytimes.com')]"),
+        ('xpath', "//a[contains(@href, 'nyt.com')]"),
+        ('css', "a[href*='nytimes.com']"),
+        ('xpath', "//a[contains(@href, '/nyt')]")
+    )
+}
+
+# Continue/next buttons for username-first flows, in priority order - each entry valid
+# for its locator type, so a miss is an empty find_elements result rather than an
+# exception. Text matches use the button's own text (as the 'text' kind in
+# JS_FIRST_CLICKABLE does), so "Continue with Google" style buttons whose label
+# sits in a nested span are not picked up
+_CONTINUE_BUTTON_SELECTORS = (
+    (By.XPATH, "//button[contains(text(),'Continue')]"),
+    (By.XPATH, "//button[contains(text(),'Next')]"),
+    (By.CSS_SELECTOR, "input[value*='Continue']"),
+    (By.CSS_SELECTOR, "input[value*='Next']"),
+    (By.CSS_SELECTOR, "[data-testid*='continue']"),
+    (By.CSS_SELECTOR, "[data-testid*='next']")
+)
+
+# Sign-in links on processing/loading pages, in priority order: link text
+# (case-insensitive) first, then href, then class
+_LOWER = "translate(normalize-space(.), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_SIGNIN_XPATHS = (
+    f"//a[contains({_LOWER}, 'sign in') or contains({_LOWER}, 'log in') or contains({_LOWER}, 'login')]",
+    "//*[contains(@href, 'signin') or contains(@href, 'login') or contains(@href, 'authenticate')]",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' sign-in-link ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' signin-link ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' login-link ')]",
+)
+
+# Same visibility test as JS_FIRST_VISIBLE, applied to already-located elements
+# (visible ones returned in their original order)
+JS_FILTER_VISIBLE = """
+return Array.prototype.filter.call(arguments[0], e => {
+    const s = getComputedStyle(e);
+    return !(s.display === 'none' || s.visibility === 'hidden' || e.getClientRects().length === 0);
+});
+"""
+
 class RenewalEngine:
     """Clean renewal engine with priority-based login and CAPTCHA solving"""
     
+    # Debug captures held in memory per renewal (oldest dropped beyond this)
+    SCREENSHOT_BUFFER_SIZE = 60
+    
+    # Back-to-back state checks within this many seconds share one page read
+    STATE_CACHE_TTL = 0.25
+    
     def __init__(self, headless: bool = False, timeout: int = 60):
         self.headless = headless
         self.timeout = timeout
         self.renewal_speed = os.environ.get('RENEWAL_SPEED', 'normal')
+        # Fast mode types whole values in one send_keys call
+        self.fast_typing = self.renewal_speed == 'fast'
         
         # Debug mode for full screenshot capture
         self.debug_mode = os.environ.get('DEBUG_MODE', 'false').lower() == 'true'
+        if not self.debug_mode:
+            # Intermediate captures are debug-only, so skip the call entirely
+            self._save_debug_screenshot = self._skip_debug_screenshot
         
         # Screenshot retention limit (number of attempts to keep)
         self.screenshot_retention = int(os.environ.get('SCREENSHOT_RETENTION', '100'))
@@ -41,9 +322,15 @@ class RenewalEngine:
         self.screenshot_base_dir = "/app/data/debug/screenshots"
         os.makedirs(self.screenshot_base_dir, exist_ok=True)
         
+        # Per-renewal state lives per thread (scheduler jobs and web requests run on separate threads)
+        self._local = threading.local()
+        
         # Current attempt directory (will be set per renewal)
         self.current_attempt_dir = None
         
+        # Browser user agent per driver (fixed for a session; entries go with the driver)
+        self._user_agents = weakref.WeakKeyDictionary()
+        
         # Log initialization at debug level only
         # Only try to log user agent if it's available (not during build)
         try:
@@ -53,23 +340,54 @@ class RenewalEngine:
             logger.debug("🎭 User-Agent will be set at runtime from docker-compose.yml")
         logger.debug(f"🚀 Clean RenewalEngine initialized (headless={headless}, timeout={timeout}s)")
     
+    @property
+    def current_attempt_dir(self) -> Optional[str]:
+        """Screenshot directory of the renewal running on this thread"""
+        return getattr(self._local, 'current_attempt_dir', None)
+    
+    @current_attempt_dir.setter
+    def current_attempt_dir(self, value: Optional[str]):
+        self._local.current_attempt_dir = value
+    
+    @property
+    def newspaper_type(self) -> Optional[str]:
+        """Newspaper type of the renewal running on this thread"""
+        return getattr(self._local, 'newspaper_type', None)
+    
+    @newspaper_type.setter
+    def newspaper_type(self, value: Optional[str]):
+        self._local.newspaper_type = value
+    
+    @property
+    def _screenshot_buffer(self) -> deque:
+        """Debug captures of the renewal running on this thread, written out by _flush_screenshots()"""
+        buffer = getattr(self._local, 'screenshot_buffer', None)
+        if buffer is None:
+            buffer = self._local.screenshot_buffer = deque(maxlen=self.SCREENSHOT_BUFFER_SIZE)
+        return buffer
+    
     def renew_account(self, account) -> Tuple[bool, Optional[str], Optional[datetime]]:
         """Main entry point for account renewal"""
+        # Resolved once - used throughout for state and log messages
+        newspaper_type = getattr(account, 'newspaper_type', 'nyt')
+        newspaper_upper = newspaper_type.upper()
+        account_label = f"{account.name} ({newspaper_upper})"
+        
         # Get library name for display FIRST (before any logging)
-        from app import LibraryConfig
-        library_config = LibraryConfig.query.filter_by(type=account.library_type).first()
+        library_config = _get_library_config(account.library_type)
         library_name = library_config.name if library_config else account.library_type
         
-        # Log the renewal start as the VERY FIRST thing
-        logger.info("")
-        logger.info("=" * 60)
-        logger.info(f"STARTING RENEWAL for {account.name} ({account.newspaper_type.upper()})")
-        logger.info("=" * 60)
-        logger.info(f"Library: {library_name}")
-        logger.info(f"Newspaper: {account.newspaper_type.upper()}")
-        logger.info(f"Timeout: {self.timeout}s")
-        logger.info("=" * 60)
-        logger.info("")
+        # Log the renewal start as the VERY FIRST thing (one record for the whole block)
+        logger.info("\n".join([
+            "",
+            "=" * 60,
+            f"STARTING RENEWAL for {account_label}",
+            "=" * 60,
+            f"Library: {library_name}",
+            f"Newspaper: {newspaper_upper}",
+            f"Timeout: {self.timeout}s",
+            "=" * 60
+        ]))
         
         start_time = time.time()
         adapter = None
@@ -85,28 +403,26 @@ class RenewalEngine:
         self.current_attempt_dir = os.path.join(self.screenshot_base_dir, f"{account_name}_{timestamp}")
         os.makedirs(self.current_attempt_dir, exist_ok=True)
         
-        # Clean up old attempts if retention limit exceeded
-        self._cleanup_old_attempts(account_name)
+        # Clean up old attempts if retention limit exceeded (off the renewal's critical path)
+        threading.Thread(target=self._cleanup_old_attempts, args=(account_name,),
+                         name="screenshot-cleanup", daemon=True).start()
         
         try:
             # Reset state detection counters for new renewal
             StateDetector.reset_all_counters()
             
             # Store newspaper type for state detection
-            self.newspaper_type = getattr(account, 'newspaper_type', 'nyt')
+            self.newspaper_type = newspaper_type
             
             # Step 1: Create library adapter
             adapter = self._create_adapter(account)
             if not adapter:
                 raise Exception("Failed to create library adapter")
             
-            # Check if this is a gift code URL (bypasses library auth)
-            newspaper_type = getattr(account, 'newspaper_type', 'nyt')
-            newspaper_url = adapter.config.get(f'{newspaper_type}_url', '')
-            is_gift_code_url = self._is_gift_code_url(newspaper_url)
-            
-            if is_gift_code_url:
-                logger.info(f"🎁 Detected gift code URL for {account.name} ({account.newspaper_type.upper()}), skipping library authentication")
+            # Check if this is a gift code URL (bypasses library auth) - the URL
+            # is only kept around for the gift code flow that needs it
+            if self._is_gift_code_url(newspaper_url := adapter.config.get(f'{newspaper_type}_url')):
+                logger.info(f"🎁 Detected gift code URL for {account_label}, skipping library authentication")
                 # Navigate directly to gift code URL
                 if not self._handle_gift_code_redemption(adapter, account, newspaper_url):
                     raise Exception("Gift code redemption failed")
@@ -121,7 +437,6 @@ class RenewalEngine:
                 # Using priority system for login
             
             # Step 4: Handle newspaper login (priority-based system)
-            newspaper_type = getattr(account, 'newspaper_type', 'nyt')
             if not self._handle_newspaper_login(adapter, account, newspaper_type):
                 raise Exception("Newspaper login failed")
             
@@ -139,13 +454,16 @@ class RenewalEngine:
                 message = f"⚠️ Renewal may need attention - Process completed but status unclear"
             
         except Exception as e:
-            logger.error(f"💥 Renewal failed for {account.name} ({account.newspaper_type.upper()}): {str(e)}")
+            logger.error(f"💥 Renewal failed for {account_label}: {str(e)}")
             final_state = "FAILURE"
             state_message = str(e)
             message = f"❌ {str(e)}"
             success = False
             
         finally:
+            # Write out debug captures buffered during the renewal
+            self._flush_screenshots()
+            
             # Always save final screenshot and clean up
             if adapter and adapter.driver:
                 self._save_final_screenshot(account, adapter.driver)
@@ -162,7 +480,7 @@ class RenewalEngine:
             result_lines = [
                 "",
                 "="*60,
-                f"RENEWAL RESULT for {account.name} ({account.newspaper_type.upper()})",
+                f"RENEWAL RESULT for {account_label}",
                 "="*60,
                 f"State: {final_state}"
             ]
@@ -171,22 +489,20 @@ class RenewalEngine:
             if expiration_datetime:
                 result_lines.append(f"Expires: {expiration_datetime}")
             result_lines.append("="*60)
-            result_lines.append("")
             
-            # Log the final summary
-            for line in result_lines:
-                if line:  # Skip empty lines in logs
-                    logger.info(line)
+            # Log the final summary as a single record
+            logger.info("\n".join(result_lines))
+            
+            # Make sure this renewal's screenshots are on disk before returning
+            self._wait_for_screenshot_writes()
         
         return success, result_url, expiration_datetime
     
     def _create_adapter(self, account):
         """Create library adapter for the account"""
         try:
-            from app import LibraryConfig
-            
-            # Get library configuration from database
-            library_config = LibraryConfig.query.filter_by(type=account.library_type).first()
+            # Get library configuration (cached per library type)
+            library_config = _get_library_config(account.library_type)
             if not library_config:
                 logger.error(f"No library configuration found for type: {account.library_type}")
                 return None
@@ -230,8 +546,9 @@ class RenewalEngine:
     
     def _authenticate_with_library(self, adapter, account) -> bool:
         """Authenticate with library (prescriptive, predictable step)"""
+        account_label = f"{account.name} ({getattr(account, 'newspaper_type', 'nyt').upper()})"
         try:
-            logger.info(f"🔐 Authenticating with library for {account.name} ({account.newspaper_type.upper()})")
+            logger.info(f"🔐 Authenticating with library for {account_label}")
             
             # Save initial screenshot
             self._save_debug_screenshot(account, adapter.driver, "library_auth_start")
@@ -240,27 +557,29 @@ class RenewalEngine:
             success = adapter.authenticate(account.library_username, account.library_password)
             
             if success:
-                logger.info(f"✅ Library authentication successful for {account.name} ({account.newspaper_type.upper()})")
+                logger.info(f"✅ Library authentication successful for {account_label}")
                 self._save_debug_screenshot(account, adapter.driver, "library_auth_success")
             else:
-                logger.error(f"❌ Library authentication failed for {account.name} ({account.newspaper_type.upper()})")
+                logger.error(f"❌ Library authentication failed for {account_label}")
                 self._save_debug_screenshot(account, adapter.driver, "library_auth_failed")
             
             return success
             
         except Exception as e:
-            logger.error(f"Library authentication error for {account.name} ({account.newspaper_type.upper()}): {str(e)}")
+            logger.error(f"Library authentication error for {account_label}: {str(e)}")
             if adapter and adapter.driver:
                 self._save_debug_screenshot(account, adapter.driver, "library_auth_error")
             return False
     
     def _access_newspaper_portal(self, adapter, account) -> bool:
         """Access newspaper portal through library"""
+        newspaper_type = getattr(account, 'newspaper_type', 'nyt')
+        newspaper_name = 'NYT' if newspaper_type == 'nyt' else 'WSJ'
+        account_label = f"{account.name} ({newspaper_type.upper()})"
+        
         try:
-            newspaper_type = getattr(account, 'newspaper_type', 'nyt')
-            newspaper_name = 'NYT' if newspaper_type == 'nyt' else 'WSJ'
             
-            logger.info(f"🗞️ Accessing {newspaper_name} portal for {account.name} ({account.newspaper_type.upper()})")
+            logger.info(f"🗞️ Accessing {newspaper_name} portal for {account_label}")
             
             # Save screenshot before accessing portal
             self._save_debug_screenshot(account, adapter.driver, f"{newspaper_type}_portal_before")
@@ -269,27 +588,28 @@ class RenewalEngine:
             success = adapter.access_newspaper(newspaper_type)
             
             if success:
-                logger.info(f"✅ Successfully accessed {newspaper_name} portal for {account.name} ({account.newspaper_type.upper()})")
+                logger.info(f"✅ Successfully accessed {newspaper_name} portal for {account_label}")
                 self._save_debug_screenshot(account, adapter.driver, f"{newspaper_type}_portal_success")
             else:
-                logger.error(f"❌ Failed to access {newspaper_name} portal for {account.name} ({account.newspaper_type.upper()})")
+                logger.error(f"❌ Failed to access {newspaper_name} portal for {account_label}")
                 self._save_debug_screenshot(account, adapter.driver, f"{newspaper_type}_portal_failed")
             
             return success
             
         except Exception as e:
-            logger.error(f"Portal access error for {account.name} ({account.newspaper_type.upper()}): {str(e)}")
+            logger.error(f"Portal access error for {account_label}: {str(e)}")
             if adapter and adapter.driver:
                 self._save_debug_screenshot(account, adapter.driver, f"{newspaper_type}_portal_error")
             return False
     
     def _handle_newspaper_login(self, adapter, account, newspaper_type: str) -> bool:
         """Handle newspaper login using priority-based system"""
+        account_label = f"{account.name} ({newspaper_type.upper()})"
         try:
             driver = adapter.driver
             newspaper_name = 'NYT' if newspaper_type == 'nyt' else 'WSJ'
             
-            logger.info(f"🎯 Starting priority-based {newspaper_name} login for {account.name} ({account.newspaper_type.upper()})")
+            logger.info(f"🎯 Starting priority-based {newspaper_name} login for {account_label}")
             
             # Get credentials
             # Get credentials from generic columns
@@ -297,48 +617,71 @@ class RenewalEngine:
             password = getattr(account, 'password', '') or getattr(account, 'newspaper_password', '')
             
             if not username or not password:
-                logger.error(f"Missing credentials for {account.name} ({account.newspaper_type.upper()})")
+                logger.error(f"Missing credentials for {account_label}")
                 return False
             
             # Save initial state
             self._save_debug_screenshot(account, driver, f"{newspaper_type}_login_start")
             
+            newspaper_domain = _NEWSPAPER_DOMAIN.get(newspaper_type, 'wsj.com')
+            
             # Priority-based login system - continue until success or definitive failure
             max_attempts = 10  # Increased for multi-step login flows
             login_successful = False
             
+            # Stop early when the page stops changing and there's nothing to submit -
+            # but not before the time the fixed per-attempt delays used to allow, as
+            # library "processing" interstitials can take that long
+            last_signature = None
+            stagnant_repeats = 0
+            login_started = time.monotonic()
+            stagnant_min_wait = self._delay_seconds('medium') * max_attempts
+            
             for attempt in range(max_attempts):
                 logger.info(f"🔄 Login attempt {attempt + 1}/{max_attempts}")
                 
                 # Check if we're on a library portal page that needs navigation
                 current_url = driver.current_url
                 # Check if we're on library page but not yet on actual newspaper site
-                on_library_page = "idm.oclc.org" in current_url
-                on_newspaper_site = ("nytimes.com" in current_url if newspaper_type == 'nyt' else "wsj.com" in current_url)
+                on_library_page = _LIBRARY_PROXY_DOMAIN in current_url
+                on_newspaper_site = newspaper_domain in current_url
                 
                 if on_library_page and not on_newspaper_site:
                     logger.info(f"🔗 On library portal page ({current_url}), looking for {newspaper_name} access link")
                     if self._click_newspaper_access_link(driver, newspaper_type):
                         logger.info(f"✅ Clicked {newspaper_name} access link")
-                        self._human_delay('medium')
+                        self._wait_after_click(driver, current_url)
                         continue
                 
+                # Fast path: on the newspaper site but off its login pages, we may
+                # already be logged in - check that before any element lookups
+                success_checked = False
+                if on_newspaper_site and not _LOGIN_URL_RE.search(current_url):
+                    if self._check_login_success_state(driver, newspaper_type):
+                        logger.info("✅ Login success state detected - stopping priority-based login")
+                        login_successful = True
+                        break
+                    success_checked = True
+                
                 # Priority 0: Check for "Sign In" link on processing/loading pages
                 if self._click_sign_in_link_if_present(driver):
                     logger.info("📝 Clicked Sign In link on processing page")
-                    self._human_delay('medium')
+                    self._wait_after_click(driver, current_url)
                     self._save_debug_screenshot(account, driver, f"{newspaper_type}_after_signin_link_{attempt + 1}")
+                    success_checked = False
                 
                 # Check for CAPTCHA first
-                if self._handle_captcha_if_present(driver, f"{newspaper_type}_login_attempt_{attempt + 1}"):
+                if self._captcha_likely_present(driver) and self._handle_captcha_if_present(driver, f"{newspaper_type}_login_attempt_{attempt + 1}"):
                     self._save_debug_screenshot(account, driver, f"{newspaper_type}_after_captcha_{attempt + 1}")
                     # After CAPTCHA solving, page may have changed - give it time to update
                     logger.info("🔄 CAPTCHA solved - waiting for page to update and checking for new login forms")
                     self._human_delay('long')
+                    success_checked = False
                     # Continue to form detection - don't skip to next iteration
                 
-                # Check if we're already logged in (success state)
-                if self._check_login_success_state(driver, newspaper_type):
+                # Check if we're already logged in (success state), unless the
+                # fast path just did so on the unchanged page
+                if not success_checked and self._check_login_success_state(driver, newspaper_type):
                     logger.info("✅ Login success state detected - stopping priority-based login")
                     login_successful = True
                     break
@@ -349,6 +692,7 @@ class RenewalEngine:
                     break
                 
                 form_submitted = False
+                self._local.last_submit = None
                 
                 # Priority 1: Try to fill both username and password if both fields available
                 if self._try_combined_login(driver, username, password, newspaper_type):
@@ -376,10 +720,13 @@ class RenewalEngine:
                 
                 # If we submitted a form, wait and check the result
                 if form_submitted:
-                    self._human_delay('long')  # Wait for navigation/processing
+                    # Wait for navigation/processing of the last submit (bounded by the
+                    # old fixed delay, so an in-flight XHR login gets the full time)
+                    submit_url, submit_field = getattr(self._local, 'last_submit', None) or (current_url, None)
+                    self._wait_for_navigation(driver, submit_url, submit_field, delay_type='long')
                     
                     # Check for CAPTCHA after form submission
-                    if self._handle_captcha_if_present(driver, f"{newspaper_type}_post_submit_captcha_{attempt + 1}"):
+                    if self._captcha_likely_present(driver) and self._handle_captcha_if_present(driver, f"{newspaper_type}_post_submit_captcha_{attempt + 1}"):
                         self._save_debug_screenshot(account, driver, f"{newspaper_type}_post_captcha_{attempt + 1}")
                         self._human_delay('medium')
                     
@@ -390,10 +737,10 @@ class RenewalEngine:
                         break
                     
                     # If still on login page, continue the loop
-                    current_url = driver.current_url.lower()
-                    if any(indicator in current_url for indicator in ['login', 'signin', 'auth', 'sso']):
+                    current_url = driver.current_url
+                    if _LOGIN_URL_RE.search(current_url):
                         logger.info(f"🔄 Still on login page ({current_url[:50]}...), continuing priority-based login")
-                    elif any(indicator in current_url for indicator in ['register', 'registration', 'create', 'join']):
+                    elif _REGISTRATION_URL_RE.search(current_url):
                         # Registration page - continue to handle terms acceptance
                         logger.info(f"📝 Reached registration page ({current_url[:50]}...), continuing to handle terms")
                         # Don't break - let Priority 4 (terms acceptance) handle it
@@ -404,7 +751,20 @@ class RenewalEngine:
                 else:
                     # No forms found to submit
                     logger.info("⚠️ No login forms found on current page")
-                    self._human_delay('medium')
+                    
+                    signature = self._login_page_signature(driver)
+                    if signature == last_signature:
+                        stagnant_repeats += 1
+                        if stagnant_repeats >= 2 and time.monotonic() - login_started >= stagnant_min_wait:
+                            logger.warning(f"⏹️ Login page unchanged for {stagnant_repeats + 1} attempts - stopping ({signature[0][:50]}...)")
+                            break
+                    else:
+                        stagnant_repeats = 0
+                    last_signature = signature
+                    
+                    # Short waits first, backing off while the page settles (scaled
+                    # like every other delay, so the total tracks RENEWAL_SPEED)
+                    time.sleep(min(0.3 * 2 ** attempt, 2.0) * self._speed_multiplier())
                 
                 # Save attempt screenshot
                 self._save_debug_screenshot(account, driver, f"{newspaper_type}_login_attempt_{attempt + 1}_end")
@@ -413,67 +773,52 @@ class RenewalEngine:
             self._human_delay('medium')
             self._save_debug_screenshot(account, driver, f"{newspaper_type}_login_final")
             
-            logger.info(f"✅ Priority-based {newspaper_name} login completed for {account.name} ({account.newspaper_type.upper()})")
+            logger.info(f"✅ Priority-based {newspaper_name} login completed for {account_label}")
             return True
             
         except Exception as e:
-            logger.error(f"Newspaper login error for {account.name} ({account.newspaper_type.upper()}): {str(e)}")
+            logger.error(f"Newspaper login error for {account_label}: {str(e)}")
             if adapter and adapter.driver:
                 self._save_debug_screenshot(account, adapter.driver, f"{newspaper_type}_login_error")
             return False
     
-    def _try_combined_login(self, driver, username: str, password: str, newspaper_type: str) -> bool:
-        """Try to fill both username and password if both fields are available"""
+    def _login_page_signature(self, driver) -> tuple:
+        """(url, readyState, text length, has username field, has password field) - one script call"""
         try:
-            # Look for username/email fields
-            username_selectors = [
-                "input[type='email']",
-                "input[name='username']", 
-                "input[name='email']",
-                "input[id='email']",
-                "input[id='username']",
-                "input[name='emailOrUsername']",  # WSJ specific
-                "input[id='emailOrUsername']",    # WSJ specific
-                "#email-input",
-                "#username-input",
-                "[data-testid='email']",
-                "[data-testid='username']"
-            ]
-            
-            # Look for password fields  
-            password_selectors = [
-                "input[type='password']",
-                "input[name='password']",
-                "input[id='password']",
-                "#password-input",
-                "[data-testid='password']"
-            ]
-            
-            username_field = None
-            password_field = None
-            
-            # Find username field
-            for selector in username_selectors:
-                try:
-                    field = driver.find_element(By.CSS_SELECTOR, selector)
-                    if field and field.is_displayed():
-                        username_field = field
-                        logger.info(f"Found username field: {selector}")
-                        break
-                except:
+            return tuple(driver.execute_script(
+                "return [location.href, document.readyState, "
+                "document.body ? (document.body.innerText || '').length : 0, "
+                "!!document.querySelector(arguments[0]), !!document.querySelector(arguments[1])];",
+                USERNAME_SELECTORS_CSS, PASSWORD_SELECTORS_CSS
+            ))
+        except Exception:
+            return (driver.current_url, None, None, None, None)
+    
+    def _first_usable_field(self, driver, css: str, require_writable: bool = False):
+        """Return the first displayed (and optionally non-readonly) element matching css, or None"""
+        try:
+            return driver.execute_script(JS_FIRST_VISIBLE, css, require_writable)
+        except Exception as e:
+            logger.debug(f"In-browser field lookup failed, checking candidates individually: {str(e)}")
+        
+        for field in driver.find_elements(By.CSS_SELECTOR, css):
+            try:
+                if not field.is_displayed():
                     continue
-            
-            # Find password field
-            for selector in password_selectors:
-                try:
-                    field = driver.find_element(By.CSS_SELECTOR, selector)
-                    # Check if field is displayed AND not readonly (NYT has hidden readonly password field)
-                    if field and field.is_displayed() and not field.get_attribute('readonly'):
-                        password_field = field
-                        logger.info(f"Found password field: {selector}")
-                        break
-                except:
+                if require_writable and field.get_attribute('readonly'):
                     continue
+                return field
+            except:
+                continue
+        return None
+    
+    def _try_combined_login(self, driver, username: str, password: str, newspaper_type: str) -> bool:
+        """Try to fill both username and password if both fields are available"""
+        try:
+            # One query per field type instead of one per selector
+            username_field = self._first_usable_field(driver, USERNAME_SELECTORS_CSS)
+            # Password must also be writable (NYT has hidden readonly password field)
+            password_field = self._first_usable_field(driver, PASSWORD_SELECTORS_CSS, require_writable=True)
             
             # If both fields available, fill them
             if username_field and password_field:
@@ -490,8 +835,9 @@ class RenewalEngine:
                 self._human_delay('small')
                 
                 # Look for submit button
+                old_url = driver.current_url
                 if self._click_submit_button(driver):
-                    self._human_delay('medium')
+                    self._wait_for_navigation(driver, old_url, password_field)
                     return True
                     
             return False
@@ -503,29 +849,11 @@ class RenewalEngine:
     def _try_username_only_flow(self, driver, username: str, newspaper_type: str) -> bool:
         """Try username-only flow with continue button"""
         try:
-            # Look for username/email fields
-            username_selectors = [
-                "input[type='email']",
-                "input[name='username']",
-                "input[name='email']", 
-                "input[id='email']",
-                "input[id='username']",
-                "input[name='emailOrUsername']",  # WSJ specific
-                "input[id='emailOrUsername']"      # WSJ specific
-            ]
-            
-            username_field = None
-            for selector in username_selectors:
-                try:
-                    field = driver.find_element(By.CSS_SELECTOR, selector)
-                    if field and field.is_displayed():
-                        username_field = field
-                        logger.info(f"Found username field for username-only flow: {selector}")
-                        break
-                except:
-                    continue
+            username_field = self._first_usable_field(driver, USERNAME_FLOW_SELECTORS_CSS)
             
             if username_field:
+                logger.info("Found username field for username-only flow")
+                
                 # Check if field already has our username value to avoid re-typing
                 current_value = username_field.get_attribute('value') or ''
                 if current_value.strip() == username.strip():
@@ -538,35 +866,22 @@ class RenewalEngine:
                     self._human_delay('small')
                 
                 # Look for continue/next button (not submit)
-                continue_selectors = [
-                    "button:contains('Continue')",
-                    "button:contains('Next')", 
-                    "input[value*='Continue']",
-                    "input[value*='Next']",
-                    "[data-testid*='continue']",
-                    "[data-testid*='next']"
-                ]
-                
-                for selector in continue_selectors:
-                    try:
-                        if "contains" in selector:
-                            # XPath for text content
-                            text = selector.split("'")[1]
-                            button = driver.find_element(By.XPATH, f"//button[contains(text(),'{text}')]")
-                        else:
-                            button = driver.find_element(By.CSS_SELECTOR, selector)
-                        
-                        if button and button.is_displayed() and button.is_enabled():
-                            logger.info(f"Clicking continue button: {selector}")
-                            button.click()
-                            self._human_delay('medium')
-                            return True
-                    except:
-                        continue
+                old_url = driver.current_url
+                for by, expression in _CONTINUE_BUTTON_SELECTORS:
+                    # Only the first match of each selector is considered
+                    for button in driver.find_elements(by, expression)[:1]:
+                        try:
+                            if button.is_displayed() and button.is_enabled():
+                                logger.info(f"Clicking continue button: {expression}")
+                                button.click()
+                                self._wait_for_navigation(driver, old_url, username_field)
+                                return True
+                        except:
+                            continue
                         
                 # If no continue button, try submit
                 if self._click_submit_button(driver):
-                    self._human_delay('medium')
+                    self._wait_for_navigation(driver, old_url, username_field)
                     return True
                     
             return False
@@ -578,26 +893,10 @@ class RenewalEngine:
     def _try_password_only_flow(self, driver, password: str, newspaper_type: str) -> bool:
         """Try password-only flow"""
         try:
-            # Look for password fields
-            password_selectors = [
-                "input[type='password']",
-                "input[name='password']",
-                "input[id='password']",
-                "#password-input",
-                "[data-testid='password']"
-            ]
-            
-            password_field = None
-            for selector in password_selectors:
-                try:
-                    field = driver.find_element(By.CSS_SELECTOR, selector)
-                    # Check if field is displayed AND not readonly (NYT has hidden readonly password field)
-                    if field and field.is_displayed() and not field.get_attribute('readonly'):
-                        password_field = field
-                        logger.info(f"Found password field: {selector}")
-                        break
-                except:
-                    continue
+            # Check if field is displayed AND not readonly (NYT has hidden readonly password field)
+            password_field = self._first_usable_field(driver, PASSWORD_SELECTORS_CSS, require_writable=True)
+            if password_field:
+                logger.info("Found password field")
             
             if password_field:
                 # Fill password
@@ -606,8 +905,9 @@ class RenewalEngine:
                 self._human_delay('small')
                 
                 # Submit the form
+                old_url = driver.current_url
                 if self._click_submit_button(driver):
-                    self._human_delay('medium')
+                    self._wait_for_navigation(driver, old_url, password_field)
                     return True
                     
             return False
@@ -850,38 +1150,18 @@ class RenewalEngine:
     def _click_sign_in_link_if_present(self, driver) -> bool:
         """Click Sign In link if present on loading/processing pages"""
         try:
-            # Look for various sign-in link patterns
-            sign_in_selectors = [
-                "a:contains('Sign In')",
-                "a:contains('sign in')",
-                "a:contains('SIGN IN')",
-                "a:contains('Log In')",
-                "a:contains('Log in')",  # NYT specific
-                "a:contains('Login')",
-                "[href*='signin']",
-                "[href*='login']",
-                "[href*='authenticate']",
-                ".sign-in-link",
-                ".signin-link",
-                ".login-link"
-            ]
-            
-            for selector in sign_in_selectors:
-                try:
-                    if "contains" in selector:
-                        # XPath for text content
-                        text = selector.split("'")[1]
-                        elements = driver.find_elements(By.XPATH, f"//a[contains(text(),'{text}')]")
-                    else:
-                        elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    
-                    for element in elements:
-                        if element and element.is_displayed() and element.is_enabled():
-                            logger.info(f"Found sign-in link: {selector}")
-                            element.click()
-                            return True
-                except:
+            # One query per pattern group in priority order, one script to drop hidden matches
+            for xpath in _SIGNIN_XPATHS:
+                elements = driver.find_elements(By.XPATH, xpath)
+                if not elements:
                     continue
+                
+                for element in driver.execute_script(JS_FILTER_VISIBLE, elements) or []:
+                    if element.is_enabled():
+                        logger.info(f"Found sign-in link: {(element.text or '').strip()[:40]}")
+                        element.click()
+                        self._invalidate_state_cache()
+                        return True
                     
             return False
             
@@ -889,10 +1169,26 @@ class RenewalEngine:
             logger.debug(f"Error looking for sign-in link: {str(e)}")
             return False
     
+    def _current_state(self, driver, newspaper_type: str, context: str) -> Tuple[str, str]:
+        """check_current_state(), reusing the last result for an immediately repeated check"""
+        key = (id(driver), newspaper_type, context)
+        cached = getattr(self._local, 'state_cache', None)
+        if cached and cached[0] == key and time.monotonic() - cached[1] < self.STATE_CACHE_TTL:
+            return cached[2]
+        
+        result = check_current_state(driver, newspaper_type, context)
+        # Timestamp after the read, so a slow page read doesn't eat the window
+        self._local.state_cache = (key, time.monotonic(), result)
+        return result
+    
+    def _invalidate_state_cache(self):
+        """Forget the cached state after anything that may change the page"""
+        self._local.state_cache = None
+    
     def _check_login_success_state(self, driver, newspaper_type: str) -> bool:
         """Check if we've reached a login success state using text-based detection"""
         try:
-            state, message = check_current_state(driver, newspaper_type, "login_check")
+            state, message = self._current_state(driver, newspaper_type, "login_check")
             
             if state in ["SUCCESS", "SUCCESS_WITH_WARNING"]:
                 logger.info(f"✅ {message}")
@@ -907,7 +1203,7 @@ class RenewalEngine:
     def _check_login_failure_state(self, driver, newspaper_type: str) -> bool:
         """Check if we've reached a definitive login failure state"""
         try:
-            state, message = check_current_state(driver, newspaper_type, "login_check")
+            state, message = self._current_state(driver, newspaper_type, "login_check")
             
             if state == "FAILURE":
                 logger.error(f"❌ {message}")
@@ -919,38 +1215,54 @@ class RenewalEngine:
             logger.debug(f"Error checking login failure state: {str(e)}")
             return False
     
+    def _click_first_clickable(self, driver, selectors) -> Optional[str]:
+        """Click the first visible, enabled match of (kind, expression) selectors; returns the expression clicked"""
+        try:
+            # All selectors are tried in-browser in one round-trip
+            match = driver.execute_script(JS_FIRST_CLICKABLE, [list(selector) for selector in selectors])
+            if not match:
+                return None
+            element, index = match
+            element.click()
+            self._invalidate_state_cache()
+            return selectors[index][1]
+        except Exception as e:
+            logger.debug(f"In-browser selector lookup failed, checking selectors individually: {str(e)}")
+        
+        for kind, expression in selectors:
+            if kind == 'css':
+                by, query = By.CSS_SELECTOR, expression
+            elif kind == 'text':
+                by, query = By.XPATH, f"//button[contains(text(),'{expression}')]"
+            else:
+                by, query = By.XPATH, expression
+            for element in driver.find_elements(by, query):
+                try:
+                    if element.is_displayed() and element.is_enabled():
+                        element.click()
+                        self._invalidate_state_cache()
+                        return expression
+                except:
+                    continue
+        return None
+    
     def _click_submit_button(self, driver) -> bool:
         """Find and click submit button"""
-        submit_selectors = [
-            "button[type='submit']",
-            "input[type='submit']",
-            "button:contains('Sign in')",
-            "button:contains('Log in')",
-            "button:contains('Login')", 
-            "[data-testid*='submit']",
-            "[data-testid*='signin']",
-            "form button",
-            ".submit-button"
-        ]
-        
-        for selector in submit_selectors:
-            try:
-                if "contains" in selector:
-                    # XPath for text content
-                    text = selector.split("'")[1]
-                    button = driver.find_element(By.XPATH, f"//button[contains(text(),'{text}')]")
-                else:
-                    button = driver.find_element(By.CSS_SELECTOR, selector)
-                
-                if button and button.is_displayed() and button.is_enabled():
-                    logger.info(f"Clicking submit button: {selector}")
-                    button.click()
-                    return True
-            except:
-                continue
-                
+        selector = self._click_first_clickable(driver, _SUBMIT_BUTTON_SELECTORS)
+        if selector:
+            logger.info(f"Clicking submit button: {selector}")
+            return True
         return False
     
+    def _captcha_likely_present(self, driver) -> bool:
+        """Cheap one-call pre-check before the full CAPTCHA state detection"""
+        try:
+            return bool(driver.execute_script("return !!document.querySelector(arguments[0]);", CAPTCHA_SELECTORS_CSS))
+        except Exception as e:
+            # Can't tell - let the full check decide
+            logger.debug(f"CAPTCHA pre-check failed: {str(e)}")
+            return True
+    
     def _handle_captcha_if_present(self, driver, context: str) -> bool:
         """Check for and solve CAPTCHA if present using state detector"""
         try:
@@ -971,6 +1283,7 @@ class RenewalEngine:
                 
                 if success:
                     logger.info("✅ CAPTCHA solved successfully")
+                    self._invalidate_state_cache()
                     # Reset CAPTCHA counter for this context on success
                     StateDetector.reset_captcha_counter(context)
                     self._human_delay('medium')
@@ -993,8 +1306,10 @@ class RenewalEngine:
     def _validate_user_agent_consistency(self, driver):
         """Validate that browser and CapSolver use the same user agent"""
         try:
-            # Get actual browser user agent
-            browser_user_agent = driver.execute_script("return navigator.userAgent")
+            # Get actual browser user agent (fetched once per driver)
+            browser_user_agent = self._user_agents.get(driver)
+            if browser_user_agent is None:
+                browser_user_agent = self._user_agents[driver] = driver.execute_script("return navigator.userAgent")
             
             # Compare with CapSolver user agent
             expected_user_agent = get_capsolver_user_agent()
@@ -1017,7 +1332,7 @@ class RenewalEngine:
             newspaper_type = getattr(account, 'newspaper_type', 'nyt')
             newspaper_name = 'NYT' if newspaper_type == 'nyt' else 'WSJ'
             
-            logger.info(f"🔍 Verifying {newspaper_name} renewal for {account.name} ({account.newspaper_type.upper()})")
+            logger.info(f"🔍 Verifying {newspaper_name} renewal for {account.name} ({newspaper_type.upper()})")
             logger.info(f"🌐 Final URL: {current_url}")
             
             # Use new text-based state detection
@@ -1054,71 +1369,105 @@ class RenewalEngine:
     def _cleanup_old_attempts(self, account_name: str):
         """Clean up old screenshot directories, keeping only the most recent N attempts"""
         try:
-            # Get all directories for this account
-            pattern = f"{account_name}_*"
+            # Get all directories for this account (scandir entries carry their
+            # type, so only the mtime needs a stat call; symlinks are never followed
+            # or removed)
+            prefix = f"{account_name}_"
             all_dirs = []
             
-            for dir_name in os.listdir(self.screenshot_base_dir):
-                if dir_name.startswith(f"{account_name}_"):
-                    dir_path = os.path.join(self.screenshot_base_dir, dir_name)
-                    if os.path.isdir(dir_path):
-                        # Get directory creation time
+            with os.scandir(self.screenshot_base_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith(prefix) and entry.is_dir(follow_symlinks=False):
                         try:
-                            mtime = os.path.getmtime(dir_path)
-                            all_dirs.append((mtime, dir_path, dir_name))
-                        except:
+                            all_dirs.append((entry.stat(follow_symlinks=False).st_mtime, entry.path, entry.name))
+                        except OSError:
                             continue
             
             # Sort by modification time (newest first)
             all_dirs.sort(reverse=True)
             
             # Keep only the most recent N attempts
-            if len(all_dirs) > self.screenshot_retention:
-                dirs_to_remove = all_dirs[self.screenshot_retention:]
-                for _, dir_path, dir_name in dirs_to_remove:
-                    try:
-                        import shutil
-                        shutil.rmtree(dir_path)
-                        logger.info(f"🗑️ Cleaned up old screenshot directory: {dir_name}")
-                    except Exception as e:
-                        logger.error(f"Failed to remove directory {dir_name}: {e}")
+            dirs_to_remove = all_dirs[self.screenshot_retention:]
+            if len(dirs_to_remove) == 1:
+                self._remove_attempt_dir(*dirs_to_remove[0][1:])
+            elif dirs_to_remove:
+                # Removals are filesystem-bound, so overlap them
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    list(executor.map(lambda item: self._remove_attempt_dir(*item[1:]), dirs_to_remove))
                         
         except Exception as e:
             logger.error(f"Error during screenshot cleanup: {e}")
     
+    def _remove_attempt_dir(self, dir_path: str, dir_name: str):
+        """Remove one old screenshot directory"""
+        try:
+            shutil.rmtree(dir_path)
+            logger.info(f"🗑️ Cleaned up old screenshot directory: {dir_name}")
+        except Exception as e:
+            logger.error(f"Failed to remove directory {dir_name}: {e}")
+    
     
     def _save_debug_screenshot(self, account, driver, step_name: str):
         """Save debug screenshot during renewal process (only in debug mode)"""
         try:
-            # Only save intermediate screenshots if debug mode is enabled
-            if not self.debug_mode:
-                return
-                
             if not driver or not self.current_attempt_dir:
                 return
                 
             timestamp = datetime.now().strftime("%H%M%S") 
             filename = f"{step_name}_{timestamp}"
             
-            # Save screenshot
-            screenshot_path = os.path.join(self.current_attempt_dir, f"{filename}.png")
-            driver.save_screenshot(screenshot_path)
-            
-            # Save HTML source (only in debug mode)
-            html_path = os.path.join(self.current_attempt_dir, f"{filename}.html")
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
-            
-            # Save URL info
-            url_path = os.path.join(self.current_attempt_dir, f"{filename}_url.txt")
-            with open(url_path, 'w') as f:
-                f.write(f"URL: {driver.current_url}\nTitle: {driver.title}\nTimestamp: {datetime.now()}")
+            # Capture now, write once the renewal is over (keeps disk I/O out of the login flow)
+            self._screenshot_buffer.append((
+                self.current_attempt_dir,
+                filename,
+                self._capture_screenshot(driver, jpeg=True),
+                driver.page_source,
+                f"URL: {driver.current_url}\nTitle: {driver.title}\nTimestamp: {datetime.now()}"
+            ))
                 
-            logger.debug(f"📸 Debug files saved: {filename}")
+            logger.debug(f"📸 Debug capture buffered: {filename}")
             
         except Exception as e:
             logger.error(f"Error saving debug screenshot: {str(e)}")
     
+    def _skip_debug_screenshot(self, account, driver, step_name: str):
+        """Stand-in for _save_debug_screenshot outside debug mode"""
+    
+    def _capture_screenshot(self, driver, jpeg: bool = False) -> Tuple[bytes, str]:
+        """Capture the viewport straight from Chrome as (image bytes, file extension)"""
+        try:
+            # JPEG debug captures are several times smaller than PNG
+            params = {"format": "jpeg", "quality": 70} if jpeg else {"format": "png"}
+            data = driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"]
+            return base64.b64decode(data), "jpg" if jpeg else "png"
+        except Exception as e:
+            # Not a Chromium driver (or the CDP call failed) - use the WebDriver capture
+            logger.debug(f"CDP screenshot failed, using WebDriver capture: {str(e)}")
+            return driver.get_screenshot_as_png(), "png"
+    
+    def _queue_write(self, path: str, data):
+        """Queue a debug file, remembering it so this renewal can wait for its own writes"""
+        # One FIFO writer: once the latest file is written, all earlier ones are too
+        self._local.last_screenshot_write = _queue_screenshot_write(path, data)
+    
+    def _wait_for_screenshot_writes(self):
+        """Block until the files this renewal queued are on disk"""
+        done = getattr(self._local, 'last_screenshot_write', None)
+        if done is not None:
+            done.wait()
+            self._local.last_screenshot_write = None
+    
+    def _flush_screenshots(self):
+        """Hand buffered debug captures to the background writer"""
+        buffer = self._screenshot_buffer
+        while buffer:
+            attempt_dir, filename, (image, image_ext), html, url_info = buffer.popleft()
+            # Screenshot, HTML source and URL info
+            self._queue_write(os.path.join(attempt_dir, f"{filename}.{image_ext}"), image)
+            self._queue_write(os.path.join(attempt_dir, f"{filename}.html"), html)
+            self._queue_write(os.path.join(attempt_dir, f"{filename}_url.txt"), url_info)
+            logger.debug(f"📸 Debug files queued: {filename}")
+    
     def _save_final_screenshot(self, account, driver, save_html: bool = None):
         """Save final screenshot for renewal attempt (always saves at least screenshot)"""
         try:
@@ -1128,21 +1477,21 @@ class RenewalEngine:
             filename = "final_result"
             
             # Always save final screenshot (this is our ONE screenshot per attempt)
+            # (captured here, written by the background writer)
             screenshot_path = os.path.join(self.current_attempt_dir, f"{filename}.png") 
-            driver.save_screenshot(screenshot_path)
+            image, _ = self._capture_screenshot(driver)
+            self._queue_write(screenshot_path, image)
             logger.info(f"📸 Final screenshot saved")
             
             # Only save HTML if in debug mode
             if self.debug_mode:
                 # Save HTML source
                 html_path = os.path.join(self.current_attempt_dir, f"{filename}.html")
-                with open(html_path, 'w', encoding='utf-8') as f:
-                    f.write(driver.page_source)
+                self._queue_write(html_path, driver.page_source)
                 
                 # Save URL info
                 url_path = os.path.join(self.current_attempt_dir, f"{filename}_url.txt")
-                with open(url_path, 'w') as f:
-                    f.write(f"Final URL: {driver.current_url}\nTitle: {driver.title}\nTimestamp: {datetime.now()}")
+                self._queue_write(url_path, f"Final URL: {driver.current_url}\nTitle: {driver.title}\nTimestamp: {datetime.now()}")
                     
                 logger.debug(f"📄 Final HTML and URL saved (debug mode)")
             
@@ -1157,7 +1506,6 @@ class RenewalEngine:
     def _log_renewal_attempt(self, account, success: bool, message: str, duration: int, is_warning: bool = False, driver=None):
         """Log renewal attempt to database"""
         try:
-            from app import app, db, RenewalLog
             from flask import has_app_context
             
             # Get screenshot filename from final screenshot
@@ -1166,6 +1514,8 @@ class RenewalEngine:
                 attempt_dir_name = os.path.basename(self.current_attempt_dir)
                 screenshot_filename = f"{attempt_dir_name}/final_result.png"
             
+            app, db, RenewalLog = _app_log_models()
+            
             def _create_log_entry():
                 log_entry = RenewalLog(
                     account_id=account.id,
@@ -1191,12 +1541,20 @@ class RenewalEngine:
     
     def _human_delay(self, delay_type: str = 'medium'):
         """Human-like delays based on renewal speed setting"""
+        time.sleep(self._delay_seconds(delay_type))
+    
+    def _speed_multiplier(self) -> float:
+        """Scale applied to every delay for the renewal speed setting"""
         if self.renewal_speed == 'fast':
-            multiplier = 0.5
+            return 0.5
         elif self.renewal_speed == 'slow':
-            multiplier = 2.0
+            return 2.0
         else:  # normal
-            multiplier = 1.0
+            return 1.0
+    
+    def _delay_seconds(self, delay_type: str = 'medium') -> float:
+        """Length of a human-like delay for the renewal speed setting"""
+        multiplier = self._speed_multiplier()
         
         delays = {
             'small': 0.5 * multiplier,
@@ -1204,80 +1562,84 @@ class RenewalEngine:
             'long': 3.0 * multiplier
         }
         
-        delay = delays.get(delay_type, 1.5 * multiplier)
-        time.sleep(delay)
+        return delays.get(delay_type, 1.5 * multiplier)
+    
+    def _wait_after_click(self, driver, old_url: str, delay_type: str = 'medium') -> bool:
+        """Wait for a click's navigation to load, never longer than the fixed delay it replaces"""
+        self._invalidate_state_cache()
+        try:
+            WebDriverWait(driver, self._delay_seconds(delay_type), poll_frequency=0.1).until(
+                lambda d: d.current_url != old_url and d.execute_script("return document.readyState") == 'complete'
+            )
+            return True
+        except TimeoutException:
+            # No navigation (in-page update) - the full delay has passed, as before
+            return False
+        except Exception as e:
+            logger.debug(f"Error waiting for navigation after click: {str(e)}")
+            return False
+    
+    def _wait_for_navigation(self, driver, old_url: Optional[str] = None, field=None,
+                             delay_type: str = 'medium') -> bool:
+        """Wait for a submit to take effect - the URL changing or the submitted field
+        leaving the page, then the load finishing - never longer than the fixed delay it replaces"""
+        self._invalidate_state_cache()
+        # Remembered so the post-submit check waits on the same signal
+        self._local.last_submit = (old_url, field)
+        if old_url is None and field is None:
+            # Nothing to watch for - fall back to the fixed delay
+            self._human_delay(delay_type)
+            return False
+        
+        def submitted(d):
+            # XHR logins leave the old document 'complete', so readyState alone says nothing
+            changed = (old_url is not None and d.current_url != old_url) or \
+                      (field is not None and EC.staleness_of(field)(d))
+            return changed and d.execute_script("return document.readyState") == 'complete'
+        
+        try:
+            WebDriverWait(driver, self._delay_seconds(delay_type), poll_frequency=0.1).until(submitted)
+            return True
+        except TimeoutException:
+            # No navigation or re-render (request still in flight) - the full delay has passed, as before
+            return False
+        except Exception as e:
+            logger.debug(f"Error waiting for navigation after submit: {str(e)}")
+            return False
     
     def _human_type(self, element, text: str):
         """Type text with human-like timing"""
         import random
         
-        for char in text:
-            element.send_keys(char)
-            # Small random delay between keystrokes
-            if self.renewal_speed != 'fast':
-                time.sleep(random.uniform(0.05, 0.15))
+        # No per-keystroke delay in fast mode, so send it all in one round-trip
+        if self.fast_typing:
+            element.send_keys(text)
+            return
+        
+        # Send short bursts of 2-4 characters, keeping the pause between them
+        i = 0
+        while i < len(text):
+            burst = random.randint(2, 4)
+            element.send_keys(text[i:i + burst])
+            i += burst
+            # Small random delay between bursts
+            time.sleep(random.uniform(0.05, 0.15))
     
-    def _is_gift_code_url(self, url: str) -> bool:
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _is_gift_code_url(url: str) -> bool:
         """Check if URL is a gift code redemption URL"""
-        if not url:
-            return False
-            
-        gift_code_indicators = [
-            'subscription/redeem',
-            'gift_code=',
-            'giftcode=',
-            'redeem?',
-            'activation?code=',
-            'promo_code=',
-            'pass_code=',
-            'enter-redemption-code',  # WSJ redemption code URL pattern
-            'partner.wsj.com/p/'      # WSJ partner redemption URL pattern
-        ]
-        
-        url_lower = url.lower()
-        return any(indicator in url_lower for indicator in gift_code_indicators)
+        return bool(url) and _GIFT_CODE_URL_RE.search(url) is not None
     
     def _click_newspaper_access_link(self, driver, newspaper_type: str) -> bool:
         """Click newspaper access link on library portal pages"""
         try:
-            if newspaper_type == 'wsj':
-                link_selectors = [
-                    "//a[contains(text(), 'Visit the Wall Street Journal')]",
-                    "//a[contains(text(), 'Visit The Wall Street Journal')]",
-                    "//a[contains(text(), 'Wall Street Journal')]",
-                    "//a[contains(text(), 'Access Wall Street Journal')]",
-                    "//a[contains(text(), 'Go to Wall Street Journal')]",
-                    "//a[contains(@href, 'wsj.com')]",
-                    "a[href*='wsj.com']",
-                    "//a[contains(@href, '/wsj')]"
-                ]
-            else:  # nyt
-                link_selectors = [
-                    "//a[contains(text(), 'Visit the New York Times')]",
-                    "//a[contains(text(), 'Visit The New York Times')]",
-                    "//a[contains(text(), 'New York Times')]",
-                    "//a[contains(text(), 'Access New York Times')]",
-                    "//a[contains(text(), 'Go to New York Times')]",
-                    "//a[contains(text(), 'NYTimes')]",
-                    "//a[contains(@href, 'nytimes.com')]",
-                    "//a[contains(@href, 'nyt.com')]",
-                    "a[href*='nytimes.com']",
-                    "//a[contains(@href, '/nyt')]"
-                ]
+            link_selectors = _NEWSPAPER_ACCESS_LINK_SELECTORS.get(newspaper_type, _NEWSPAPER_ACCESS_LINK_SELECTORS['nyt'])
             
-            for selector in link_selectors:
-                try:
-                    if selector.startswith("//"):
-                        element = driver.find_element(By.XPATH, selector)
-                    else:
-                        element = driver.find_element(By.CSS_SELECTOR, selector)
-                    
-                    if element and element.is_displayed() and element.is_enabled():
-                        logger.info(f"Found {newspaper_type.upper()} link: {selector}")
-                        element.click()
-                        return True
-                except:
-                    continue
+            selector = self._click_first_clickable(driver, link_selectors)
+            if selector:
+                logger.info(f"Found {newspaper_type.upper()} link: {selector}")
+                return True
                     
             return False
         except Exception as e:
@@ -1297,48 +1659,18 @@ class RenewalEngine:
             self._save_debug_screenshot(account, adapter.driver, "gift_code_page")
             
             # Check if we've been redirected to a login page (WSJ partner URLs do this)
-            current_url = adapter.driver.current_url.lower()
-            if any(indicator in current_url for indicator in ['login', 'signin', 'auth', 'sso']):
+            current_url = adapter.driver.current_url
+            if _LOGIN_URL_RE.search(current_url):
                 logger.info(f"🔄 Gift code URL redirected to login page: {current_url[:100]}...")
                 # The gift code has been applied via URL, just need to login now
                 return True
             
             # Look for and click redemption button (for URLs that have a redemption page)
-            redeem_selectors = [
-                "button[type='submit']",
-                "input[type='submit']",
-                "button:contains('Redeem')",
-                "button:contains('Submit')",
-                "button:contains('Continue')",
-                "button:contains('Get Access')",
-                "button:contains('Activate')",
-                "[data-testid*='redeem']",
-                "[data-testid*='submit']",
-                ".redeem-button",
-                ".submit-button"
-            ]
-            
-            button_clicked = False
-            for selector in redeem_selectors:
-                try:
-                    if ":contains" in selector:
-                        # XPath for text content
-                        text = selector.split("'")[1]
-                        button = adapter.driver.find_element(By.XPATH, f"//button[contains(text(),'{text}')]")
-                    else:
-                        button = adapter.driver.find_element(By.CSS_SELECTOR, selector)
-                    
-                    if button and button.is_displayed() and button.is_enabled():
-                        logger.info(f"Clicking redemption button: {selector}")
-                        button.click()
-                        button_clicked = True
-                        break
-                except:
-                    continue
-            
-            if button_clicked:
+            selector = self._click_first_clickable(adapter.driver, _REDEEM_BUTTON_SELECTORS)
+            if selector:
+                logger.info(f"Clicked redemption button: {selector}")
                 logger.info("✅ Gift code redemption button clicked")
-                self._human_delay('medium')
+                self._wait_after_click(adapter.driver, current_url)
                 self._save_debug_screenshot(account, adapter.driver, "gift_code_submitted")
                 return True
             else:
@@ -2,6 +2,7 @@
 Standardized renewal status system for Newspaparr.
 Provides consistent 3-state model: SUCCESS, SUCCESS_WITH_WARNING, FAILURE
 """
+import functools
 from enum import Enum
 from typing import Optional, Tuple
 import re
@@ -55,48 +56,133 @@ class RenewalMessage:
         return RenewalMessage.SUCCESS_VERIFIED
 
 
+def _compile_patterns(*patterns: str) -> re.Pattern:
+    """Compile a category's patterns once into one case-insensitive alternation"""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+
+def _compile_classifier(categories: Tuple[Tuple[str, re.Pattern], ...]) -> re.Pattern:
+    """Combine category regexes into one, each category a named group"""
+    return re.compile("|".join(f"(?P<{name}>{regex.pattern})" for name, regex in categories), re.IGNORECASE)
+
+
+def _success_result(page_text: str) -> Tuple[RenewalStatus, str]:
+    """Success, with the expiration date if the page has one"""
+    expiration_date = StateDetector._extract_expiration_date(page_text)
+    return RenewalStatus.SUCCESS, RenewalMessage.format_success(expiration_date)
+
+
+def _access_denied_result(page_text: str) -> Tuple[RenewalStatus, str]:
+    """Access denied, narrowed to the reason the page gives"""
+    # Only this category needs the lowercased text
+    text_lower = page_text.lower()
+    if "expired" in text_lower:
+        return RenewalStatus.FAILURE, RenewalMessage.FAIL_ACCESS_EXPIRED
+    elif "geographic" in text_lower or "region" in text_lower:
+        return RenewalStatus.FAILURE, RenewalMessage.FAIL_ACCESS_GEO_RESTRICTED
+    else:
+        return RenewalStatus.FAILURE, RenewalMessage.FAIL_ACCESS_UNAVAILABLE
+
+
 class StateDetector:
     """Detect renewal state from page content and context"""
     
+    # Each category is compiled once at class load into a single alternation,
+    # so checking it is one pass over the text (case-insensitive)
+    
     # Success patterns - using word boundaries to avoid false positives
-    SUCCESS_PATTERNS = [
+    SUCCESS_RE = _compile_patterns(
         r"\byour pass is active\b",  # Word boundaries prevent matching "btn--active"
         r"\blibrary pass activated\b",
         r"\bsuccessfully activated\b",
         r"\brenewal successful\b",
-        r"\bsubscription.*(?:current|existing)\b",
-        r"\baccess.*verified\b"
-    ]
+        r"\bsubscription.*?(?:current|existing)\b",
+        r"\baccess.*?verified\b"
+    )
     
     # Direct subscription patterns (warning state)
-    DIRECT_SUB_PATTERNS = [
-        "already associated with an active.*subscription",
-        "already have.*subscription",
-        "existing.*subscription.*active"
-    ]
+    DIRECT_SUB_RE = _compile_patterns(
+        "already associated with an active.*?subscription",
+        "already have.*?subscription",
+        "existing.*?subscription.*?active"
+    )
     
     # Failure patterns by category
-    INVALID_CREDS_PATTERNS = [
-        "invalid.*(?:username|password|credentials)",
-        "incorrect.*(?:username|password|credentials)",
-        "email address.*doesn't match",
+    INVALID_CREDS_RE = _compile_patterns(
+        "invalid.*?(?:username|password|credentials)",
+        "incorrect.*?(?:username|password|credentials)",
+        "email address.*?doesn't match",
         "password is incorrect"
-    ]
+    )
     
-    MAINTENANCE_PATTERNS = [
+    # "under maintenance" is already covered by "maintenance"
+    MAINTENANCE_RE = _compile_patterns(
         "maintenance",
-        "under maintenance",
         "temporarily unavailable"
-    ]
+    )
     
-    ACCESS_DENIED_PATTERNS = [
+    ACCESS_DENIED_RE = _compile_patterns(
         "not available",
         "unavailable",
-        "service.*not.*available",
-        "subscription.*expired",
-        "geographic.*restriction",
-        "region.*not.*supported"
-    ]
+        "service.*?not.*?available",
+        "subscription.*?expired",
+        "geographic.*?restriction",
+        "region.*?not.*?supported"
+    )
+    
+    # Pattern categories in priority order, and all of them as one classifier
+    # so the page is scanned once to find which categories are present
+    CATEGORIES = (
+        ('direct_sub', DIRECT_SUB_RE),
+        ('success', SUCCESS_RE),
+        ('invalid_creds', INVALID_CREDS_RE),
+        ('maintenance', MAINTENANCE_RE),
+        ('access_denied', ACCESS_DENIED_RE)
+    )
+    CATEGORY_RANK = {name: rank for rank, (name, _) in enumerate(CATEGORIES)}
+    CLASSIFIER_RE = _compile_classifier(CATEGORIES)
+    
+    # Result for each category - a (status, message) pair, or a function of the page text
+    CATEGORY_RESULTS = {
+        'direct_sub': (RenewalStatus.SUCCESS_WITH_WARNING, RenewalMessage.WARN_DIRECT_SUBSCRIPTION),
+        'success': _success_result,
+        'invalid_creds': (RenewalStatus.FAILURE, RenewalMessage.FAIL_CREDS_INVALID),
+        'maintenance': (RenewalStatus.FAILURE, RenewalMessage.FAIL_LIBRARY_MAINTENANCE),
+        'access_denied': _access_denied_result
+    }
+    # Categories that win over the URL and CAPTCHA checks; the rest are only
+    # reported once those checks have passed
+    EARLY_CATEGORIES = frozenset(('direct_sub', 'success'))
+    
+    @staticmethod
+    def _top_category(text: str) -> Optional[str]:
+        """Highest-priority pattern category found in the text, or None"""
+        best = None
+        for match in StateDetector.CLASSIFIER_RE.finditer(text):
+            rank = StateDetector.CATEGORY_RANK[match.lastgroup]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        
+        if best is None:
+            # No alternative matches anywhere, so no category is present
+            return None
+        
+        # Matches don't overlap, so a higher-priority phrase could sit inside an
+        # earlier match's span - check just those categories directly
+        for name, regex in StateDetector.CATEGORIES[:best]:
+            if regex.search(text):
+                return name
+        return StateDetector.CATEGORIES[best][0]
+    
+    # Every DateExtractor pattern needs a four-digit year, so text without one
+    # can't contain an expiration date
+    DATE_HINT_RE = re.compile(r"\d{4}")
+    
+    # Repeat checks of the same page reuse the result (pages above this size
+    # aren't kept, to bound the cache's memory)
+    STATE_CACHE_MAX_TEXT = 1024 * 1024
     
     @staticmethod
     def detect_state(page_text: str, 
@@ -109,17 +195,28 @@ class StateDetector:
         Detect renewal state from page content and context.
         Returns (status, message) tuple.
         """
-        text_lower = page_text.lower()
-        
-        # Check for direct subscription (warning state)
-        if any(re.search(pattern, text_lower) for pattern in StateDetector.DIRECT_SUB_PATTERNS):
-            return RenewalStatus.SUCCESS_WITH_WARNING, RenewalMessage.WARN_DIRECT_SUBSCRIPTION
+        # Positional arguments only, so equal calls always share a cache key
+        args = (page_text, url, has_error, captcha_detected, captcha_solved, process_completed)
+        if len(page_text) <= StateDetector.STATE_CACHE_MAX_TEXT:
+            return _cached_detect_state(*args)
+        return StateDetector._detect_state(*args)
+    
+    @staticmethod
+    def _detect_state(page_text: str,
+                     url: str,
+                     has_error: bool,
+                     captcha_detected: bool,
+                     captcha_solved: bool,
+                     process_completed: bool) -> Tuple[RenewalStatus, str]:
+        """detect_state() without the cache"""
+        # A blank page can't match any pattern - skip the scan. Patterns are
+        # case-insensitive, so the text is matched as-is without a lowercased copy
+        page_blank = not page_text.strip()
+        category = None if page_blank else StateDetector._top_category(page_text)
         
-        # Check for success patterns
-        if any(re.search(pattern, text_lower) for pattern in StateDetector.SUCCESS_PATTERNS):
-            # Extract expiration date if present
-            expiration_date = StateDetector._extract_expiration_date(page_text)
-            return RenewalStatus.SUCCESS, RenewalMessage.format_success(expiration_date)
+        # Subscription and success patterns take priority over everything else
+        if category in StateDetector.EARLY_CATEGORIES:
+            return StateDetector._category_result(category, page_text)
         
         # WSJ specific: Check URL for success
         if "wsj.com" in url and not any(x in url for x in ["login", "activate", "partner.wsj.com"]):
@@ -132,27 +229,17 @@ class StateDetector:
                     return RenewalStatus.FAILURE, RenewalMessage.FAIL_CAPTCHA_SOLVE_FAILED
                 else:
                     return RenewalStatus.FAILURE, RenewalMessage.FAIL_CAPTCHA_NO_SOLVER
-            elif process_completed and not any(re.search(p, text_lower) for p in StateDetector.SUCCESS_PATTERNS):
+            elif process_completed:
+                # Success patterns already returned above
                 return RenewalStatus.SUCCESS_WITH_WARNING, RenewalMessage.WARN_PROCESS_UNCLEAR
         
         # Check for failure patterns
-        if any(re.search(pattern, text_lower) for pattern in StateDetector.INVALID_CREDS_PATTERNS):
-            return RenewalStatus.FAILURE, RenewalMessage.FAIL_CREDS_INVALID
-        
-        if any(re.search(pattern, text_lower) for pattern in StateDetector.MAINTENANCE_PATTERNS):
-            return RenewalStatus.FAILURE, RenewalMessage.FAIL_LIBRARY_MAINTENANCE
-        
-        if any(re.search(pattern, text_lower) for pattern in StateDetector.ACCESS_DENIED_PATTERNS):
-            if "expired" in text_lower:
-                return RenewalStatus.FAILURE, RenewalMessage.FAIL_ACCESS_EXPIRED
-            elif "geographic" in text_lower or "region" in text_lower:
-                return RenewalStatus.FAILURE, RenewalMessage.FAIL_ACCESS_GEO_RESTRICTED
-            else:
-                return RenewalStatus.FAILURE, RenewalMessage.FAIL_ACCESS_UNAVAILABLE
+        if category is not None:
+            return StateDetector._category_result(category, page_text)
         
         # Check for technical failures
         if has_error:
-            if not page_text.strip():
+            if page_blank:
                 return RenewalStatus.FAILURE, RenewalMessage.FAIL_TECH_PAGE_LOAD
             else:
                 return RenewalStatus.FAILURE, RenewalMessage.FAIL_TECH_ELEMENTS_MISSING
@@ -164,14 +251,27 @@ class StateDetector:
         # Default failure
         return RenewalStatus.FAILURE, RenewalMessage.FAIL_TECH_ELEMENTS_MISSING
     
+    @staticmethod
+    def _category_result(category: str, page_text: str) -> Tuple[RenewalStatus, str]:
+        """Look up the (status, message) for a detected category"""
+        result = StateDetector.CATEGORY_RESULTS[category]
+        return result(page_text) if callable(result) else result
+    
     @staticmethod
     def _extract_expiration_date(text: str) -> Optional[str]:
         """Extract expiration date from text if present"""
+        if not StateDetector.DATE_HINT_RE.search(text):
+            return None
+        
         # Use unified extractor to get both datetime and display string
         _, display_date = DateExtractor.extract_expiration(text, "StateDetector")
         return display_date
 
 
+# The result depends only on the arguments, so identical checks are served from here
+_cached_detect_state = functools.lru_cache(maxsize=32)(StateDetector._detect_state)
+
+
 def determine_renewal_state(page_text: str,
                           url: str = "",
                           has_error: bool = False,
@@ -13,15 +13,96 @@ import socket
 import json
 import os
 import time
+import heapq
 import threading
+import multiprocessing
+
+# Optional faster event loop (libuv-based); the stock asyncio loop is used without it
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Store active credentials
+# Store active credentials (mirrors CREDENTIALS_FILE, which the 'add'/'remove' CLI writes)
 ACTIVE_CREDENTIALS = {}
+# Credentials added in-process with persist=False - never written to or reloaded from the file
+LOCAL_CREDENTIALS = {}
 CREDENTIALS_FILE = "/tmp/newspaparr_socks5_proxy_creds.json"
 
+# Orphaned credentials are removed this long after creation (safety buffer -
+# credentials are normally removed right after use)
+CREDENTIAL_TTL = 600
+# Longest the cleanup task sleeps - credentials the CLI writes to the file
+# aren't known here until the next reload
+CLEANUP_MAX_SLEEP = 300
+# Min-heap of (expiry, key) for ACTIVE_CREDENTIALS; entries for credentials since
+# removed or re-added are dropped when popped
+_EXPIRY_HEAP = []
+_EXPIRY_LOCK = threading.Lock()
+
+# Listener settings - CAPTCHA solvers open connections in bursts
+LISTEN_OPTIONS = {'backlog': 1024}
+
+# Standalone server processes sharing the port (needs SO_REUSEPORT so the kernel
+# spreads connections across them); each reloads credentials from CREDENTIALS_FILE
+SERVER_WORKERS = max(1, int(os.environ.get('SOCKS5_PROXY_WORKERS', '1'))) if hasattr(socket, 'SO_REUSEPORT') else 1
+
+# Precompiled wire formats, so the format strings aren't parsed on every call
+_BB = struct.Struct('!BB')
+_BBBB = struct.Struct('!BBBB')
+_H = struct.Struct('!H')
+
+def _build_reply(status, bind_addr='0.0.0.0', bind_port=0):
+    """SOCKS5 reply bytes for a status and IPv4 bind address"""
+    return _BBBB.pack(5, status, 0, 1) + socket.inet_aton(bind_addr) + _H.pack(bind_port)
+
+# Replies with the default 0.0.0.0:0 bind address, built once
+# (0 = success, 1 = general failure, 7 = command not supported, 8 = address type not supported)
+DEFAULT_REPLIES = {status: _build_reply(status) for status in (0, 1, 7, 8)}
+
+# Method-selection replies, built once (0 = no auth, 2 = username/password, 255 = no acceptable method)
+METHOD_REPLIES = {method: _BB.pack(5, method) for method in (0, 2, 255)}
+# Username/password auth replies (0 = success, 1 = failure)
+AUTH_REPLIES = {status: _BB.pack(1, status) for status in (0, 1)}
+
+def new_event_loop():
+    """Event loop for the proxy - uvloop when installed, otherwise asyncio's default"""
+    return uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+
+def run_event_loop(coro):
+    """asyncio.run() on a loop from new_event_loop()"""
+    if hasattr(asyncio, 'Runner'):
+        with asyncio.Runner(loop_factory=new_event_loop) as runner:
+            return runner.run(coro)
+    loop = new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+# Relay reads: larger chunks mean fewer trips through the event loop per transfer
+RELAY_CHUNK_SIZE = 65536
+RELAY_IDLE_TIMEOUT = 120.0
+# Seconds between progress summaries for a long-running relay
+RELAY_LOG_INTERVAL = 30.0
+
+if hasattr(asyncio, 'timeout'):
+    async def read_with_timeout(reader, n, timeout):
+        """reader.read(n) with a timeout (asyncio.timeout doesn't wrap the read in a task)"""
+        async with asyncio.timeout(timeout):
+            return await reader.read(n)
+else:
+    async def read_with_timeout(reader, n, timeout):
+        """reader.read(n) with a timeout"""
+        return await asyncio.wait_for(reader.read(n), timeout=timeout)
+
+async def read_exact(reader, n, timeout=30.0):
+    """Read exactly n bytes (raises IncompleteReadError if the client disconnects first)"""
+    return await asyncio.wait_for(reader.readexactly(n), timeout=timeout)
+
 class SOCKS5Server:
     def __init__(self, host='0.0.0.0', port=3333):
         self.host = host
@@ -30,6 +111,13 @@ class SOCKS5Server:
     async def handle_client(self, reader, writer):
         """Handle SOCKS5 client connection"""
         client_addr = writer.get_extra_info('peername')
+        # Handshake packets are tiny and interactive - don't let Nagle delay them
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
         logger.info(f"🔗 New SOCKS5 connection from {client_addr[0]}:{client_addr[1]}")
         
         try:
@@ -53,47 +141,47 @@ class SOCKS5Server:
         """Perform SOCKS5 authentication handshake"""
         try:
             # Read greeting with timeout
-            data = await asyncio.wait_for(reader.read(2), timeout=30.0)
-            if len(data) < 2:
-                return False
+            data = await read_exact(reader, 2)
                 
-            version, nmethods = struct.unpack('!BB', data)
+            version, nmethods = _BB.unpack(data)
             if version != 5:
                 logger.error(f"❌ Unsupported SOCKS version: {version} from {client_addr[0]}")
                 return False
                 
             # Read methods
-            methods = await asyncio.wait_for(reader.read(nmethods), timeout=30.0)
-            if len(methods) != nmethods:
-                return False
+            methods = await read_exact(reader, nmethods)
                 
-            # Check if client supports username/password auth (method 2)
+            # Check if client supports username/password auth (method 2) - a
+            # membership test on bytes is a single C-level scan
             if 2 in methods:
                 # Require username/password authentication
-                writer.write(struct.pack('!BB', 5, 2))
+                writer.write(METHOD_REPLIES[2])
                 await writer.drain()
                 logger.info(f"🔐 Requesting authentication from {client_addr[0]}")
                 return await self.handle_auth(reader, writer, client_addr)
             elif 0 in methods:
                 # Allow no authentication for internal connections
                 if client_addr[0] in ['127.0.0.1', '::1']:
-                    writer.write(struct.pack('!BB', 5, 0))
+                    writer.write(METHOD_REPLIES[0])
                     await writer.drain()
                     logger.info(f"🏠 No auth required for internal client {client_addr[0]}")
                     return True
                 else:
                     # External connection without auth support
-                    writer.write(struct.pack('!BB', 5, 255))
+                    writer.write(METHOD_REPLIES[255])
                     await writer.drain()
                     logger.warning(f"❌ External client {client_addr[0]} doesn't support auth")
                     return False
             else:
                 # No acceptable methods
-                writer.write(struct.pack('!BB', 5, 255))
+                writer.write(METHOD_REPLIES[255])
                 await writer.drain()
                 logger.warning(f"❌ No acceptable auth methods from {client_addr[0]}")
                 return False
                 
+        except asyncio.IncompleteReadError:
+            # Client hung up mid-greeting
+            return False
         except asyncio.TimeoutError:
             logger.warning(f"⏰ Handshake timeout with {client_addr[0]}")
             return False
@@ -104,49 +192,34 @@ class SOCKS5Server:
     async def handle_auth(self, reader, writer, client_addr):
         """Handle username/password authentication"""
         try:
-            # Read auth request with timeout
-            data = await asyncio.wait_for(reader.read(1), timeout=30.0)
-            if len(data) < 1:
-                return False
-                
-            version = struct.unpack('!B', data)[0]
+            # Read auth request with timeout (version and username length)
+            version, ulen = _BB.unpack(await read_exact(reader, 2))
             if version != 1:
                 return False
                 
-            # Read username
-            data = await asyncio.wait_for(reader.read(1), timeout=30.0)
-            if len(data) < 1:
-                return False
-            ulen = struct.unpack('!B', data)[0]
-            
-            username = await asyncio.wait_for(reader.read(ulen), timeout=30.0)
-            if len(username) != ulen:
-                return False
-            username = username.decode('utf-8')
+            # Read username along with the password length that follows it
+            data = await read_exact(reader, ulen + 1)
+            username = data[:ulen].decode('utf-8')
+            plen = data[ulen]
             
             # Read password
-            data = await asyncio.wait_for(reader.read(1), timeout=30.0)
-            if len(data) < 1:
-                return False
-            plen = struct.unpack('!B', data)[0]
-            
-            password = await asyncio.wait_for(reader.read(plen), timeout=30.0)
-            if len(password) != plen:
-                return False
-            password = password.decode('utf-8')
+            password = (await read_exact(reader, plen)).decode('utf-8')
             
             # Verify credentials
             if self.verify_credentials(username, password):
-                writer.write(struct.pack('!BB', 1, 0))  # Success
+                writer.write(AUTH_REPLIES[0])  # Success
                 await writer.drain()
                 logger.info(f"✅ Authentication successful for {username} from {client_addr[0]}")
                 return True
             else:
-                writer.write(struct.pack('!BB', 1, 1))  # Failure
+                writer.write(AUTH_REPLIES[1])  # Failure
                 await writer.drain()
                 logger.warning(f"❌ Authentication failed for {username} from {client_addr[0]}")
                 return False
                 
+        except asyncio.IncompleteReadError:
+            # Client hung up mid-request
+            return False
         except asyncio.TimeoutError:
             logger.warning(f"⏰ Auth timeout with {client_addr[0]}")
             return False
@@ -156,12 +229,13 @@ class SOCKS5Server:
             
     def verify_credentials(self, username, password):
         """Verify SOCKS5 credentials"""
-        load_credentials()
         user_key = f"{username}:{password}"
+        if user_key not in LOCAL_CREDENTIALS:
+            load_credentials()
         
-        logger.info(f"🔐 Checking SOCKS5 credentials for user: {username} (have {len(ACTIVE_CREDENTIALS)} active creds)")
+        logger.info(f"🔐 Checking SOCKS5 credentials for user: {username} (have {len(ACTIVE_CREDENTIALS) + len(LOCAL_CREDENTIALS)} active creds)")
         
-        if user_key in ACTIVE_CREDENTIALS:
+        if user_key in LOCAL_CREDENTIALS or user_key in ACTIVE_CREDENTIALS:
             logger.info(f"✅ Valid SOCKS5 credentials for user: {username}")
             return True
         
@@ -171,40 +245,28 @@ class SOCKS5Server:
     async def handle_connect(self, reader, writer, client_addr):
         """Handle SOCKS5 CONNECT request"""
         try:
-            # Read CONNECT request with timeout
-            data = await asyncio.wait_for(reader.read(4), timeout=30.0)
-            if len(data) < 4:
-                return
+            # Read CONNECT request with timeout (header plus the first address byte,
+            # which every address type has)
+            data = await read_exact(reader, 5)
                 
-            version, cmd, rsv, atyp = struct.unpack('!BBBB', data)
+            version, cmd, rsv, atyp = _BBBB.unpack_from(data)
             if version != 5 or cmd != 1:  # Only support CONNECT
                 await self.send_reply(writer, 7)  # Command not supported
                 return
                 
-            # Read address
+            # Read the rest of the address and the port in one go
             if atyp == 1:  # IPv4
-                addr_data = await asyncio.wait_for(reader.read(4), timeout=30.0)
-                if len(addr_data) < 4:
-                    return
-                addr = socket.inet_ntoa(addr_data)
+                rest = await read_exact(reader, 3 + 2)
+                addr = socket.inet_ntoa(data[4:5] + rest[:3])
             elif atyp == 3:  # Domain name
-                addr_len_data = await asyncio.wait_for(reader.read(1), timeout=30.0)
-                if len(addr_len_data) < 1:
-                    return
-                addr_len = struct.unpack('!B', addr_len_data)[0]
-                addr_data = await asyncio.wait_for(reader.read(addr_len), timeout=30.0)
-                if len(addr_data) < addr_len:
-                    return
-                addr = addr_data.decode('utf-8')
+                addr_len = data[4]
+                rest = await read_exact(reader, addr_len + 2)
+                addr = rest[:addr_len].decode('utf-8')
             else:
                 await self.send_reply(writer, 8)  # Address type not supported
                 return
                 
-            # Read port
-            port_data = await asyncio.wait_for(reader.read(2), timeout=30.0)
-            if len(port_data) < 2:
-                return
-            port = struct.unpack('!H', port_data)[0]
+            port = _H.unpack_from(rest, len(rest) - 2)[0]
             
             logger.info(f"🎯 SOCKS5 CONNECT: {client_addr[0]} → {addr}:{port}")
             
@@ -229,6 +291,9 @@ class SOCKS5Server:
                 logger.error(f"❌ Failed to connect to {addr}:{port}: {e}")
                 await self.send_reply(writer, 1)  # General SOCKS server failure
                 
+        except asyncio.IncompleteReadError:
+            # Client hung up mid-request
+            return
         except asyncio.TimeoutError:
             logger.warning(f"⏰ CONNECT request timeout from {client_addr[0]}")
         except Exception as e:
@@ -242,17 +307,19 @@ class SOCKS5Server:
                 bind_addr = '0.0.0.0'
                 bind_port = 0
             
-            # Convert bind address to bytes
-            addr_bytes = socket.inet_aton(bind_addr)
-            reply = struct.pack('!BBBB', 5, status, 0, 1) + addr_bytes + struct.pack('!H', bind_port)
+            # Common replies are prebuilt; anything else is packed here
+            reply = None
+            if bind_addr == '0.0.0.0' and bind_port == 0:
+                reply = DEFAULT_REPLIES.get(status)
+            if reply is None:
+                reply = _build_reply(status, bind_addr, bind_port)
             writer.write(reply)
             await writer.drain()
         except Exception as e:
             logger.error(f"❌ Error sending reply: {e}")
             # Fallback with 0.0.0.0 if address conversion fails
             try:
-                addr_bytes = socket.inet_aton('0.0.0.0')
-                reply = struct.pack('!BBBB', 5, status, 0, 1) + addr_bytes + struct.pack('!H', 0)
+                reply = DEFAULT_REPLIES.get(status) or _build_reply(status)
                 writer.write(reply)
                 await writer.drain()
             except:
@@ -260,18 +327,18 @@ class SOCKS5Server:
             
     async def relay_data_capsolver(self, client_reader, client_writer, target_reader, target_writer, client_addr, target_info):
         """Optimized bidirectional data relay for CapSolver"""
-        bytes_client_to_target = 0
-        bytes_target_to_client = 0
-        last_log_time = time.time()
+        # Bytes relayed per direction: [client→target, target→client]
+        transferred = [0, 0]
+        last_log_time = time.monotonic()
         
-        async def forward(reader, writer, direction):
-            nonlocal bytes_client_to_target, bytes_target_to_client, last_log_time
+        async def forward(reader, writer, direction, index):
+            nonlocal last_log_time
             try:
                 logger.debug(f"🔄 Starting {direction} relay for {client_addr[0]} ↔ {target_info}")
                 while True:
                     try:
                         # Use appropriate buffer and timeout for CapSolver
-                        data = await asyncio.wait_for(reader.read(32768), timeout=120.0)  
+                        data = await read_with_timeout(reader, RELAY_CHUNK_SIZE, RELAY_IDLE_TIMEOUT)
                         if not data:
                             break
                         
@@ -279,16 +346,14 @@ class SOCKS5Server:
                         await writer.drain()
                         
                         # Track bytes
-                        if direction == "client→target":
-                            bytes_client_to_target += len(data)
-                        else:
-                            bytes_target_to_client += len(data)
+                        transferred[index] += len(data)
                             
-                        # Consolidated logging - only log summary every 5 seconds or on large transfers
-                        current_time = time.time()
-                        if len(data) > 10000 or (current_time - last_log_time) > 5:
-                            total_bytes = bytes_client_to_target + bytes_target_to_client
-                            logger.info(f"📊 Data relay active: {client_addr[0]} ↔ {target_info} (↑{bytes_client_to_target:,} ↓{bytes_target_to_client:,} = {total_bytes:,} bytes)")
+                        # Consolidated logging - at most one summary per interval, and the
+                        # message is only formatted when it's due and INFO is enabled
+                        current_time = time.monotonic()
+                        if current_time - last_log_time > RELAY_LOG_INTERVAL and logger.isEnabledFor(logging.INFO):
+                            up, down = transferred
+                            logger.info(f"📊 Data relay active: {client_addr[0]} ↔ {target_info} (↑{up:,} ↓{down:,} = {up + down:,} bytes)")
                             last_log_time = current_time
                         
                     except asyncio.TimeoutError:
@@ -308,98 +373,162 @@ class SOCKS5Server:
         # Start forwarding in both directions
         try:
             await asyncio.gather(
-                forward(client_reader, target_writer, "client→target"),
-                forward(target_reader, client_writer, "target→client"),
+                forward(client_reader, target_writer, "client→target", 0),
+                forward(target_reader, client_writer, "target→client", 1),
                 return_exceptions=True
             )
         finally:
-            total_bytes = bytes_client_to_target + bytes_target_to_client
-            if total_bytes > 0:
-                logger.info(f"✅ Relay complete: {client_addr[0]} ↔ {target_info} (↑{bytes_client_to_target:,} ↓{bytes_target_to_client:,} = {total_bytes:,} bytes)")
+            up, down = transferred
+            if up + down > 0:
+                logger.info(f"✅ Relay complete: {client_addr[0]} ↔ {target_info} (↑{up:,} ↓{down:,} = {up + down:,} bytes)")
             else:
                 logger.debug(f"✅ Relay complete: {client_addr[0]} ↔ {target_info} (no data transferred)")
         
-    async def start_server(self):
-        """Start the SOCKS5 server"""
+    async def start_server(self, run_cleanup=True):
+        """Start the SOCKS5 server (run_cleanup=False leaves credential expiry to another worker)"""
         server = await asyncio.start_server(
             self.handle_client, 
             self.host, 
-            self.port
+            self.port,
+            # Only standalone workers share the port; a lone listener keeps it exclusive
+            reuse_port=SERVER_WORKERS > 1 or None,
+            **LISTEN_OPTIONS
         )
         
         logger.info(f"🚀 CapSolver SOCKS5 proxy server running on {self.host}:{self.port}")
         
-        async with server:
-            await server.serve_forever()
+        cleanup_task = asyncio.create_task(cleanup_loop()) if run_cleanup else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if cleanup_task:
+                cleanup_task.cancel()
+
+def _credentials_file_stamp():
+    """(mtime, size) of the credentials file, or None if it doesn't exist"""
+    try:
+        st = os.stat(CREDENTIALS_FILE)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+# Stamp of the file contents currently in ACTIVE_CREDENTIALS
+_CREDENTIALS_STAMP = None
 
 def load_credentials():
-    """Load credentials from file"""
-    global ACTIVE_CREDENTIALS
+    """Load credentials from file (only re-read once the file has changed)"""
+    global ACTIVE_CREDENTIALS, _CREDENTIALS_STAMP
     try:
-        if os.path.exists(CREDENTIALS_FILE):
-            with open(CREDENTIALS_FILE, 'r') as f:
-                ACTIVE_CREDENTIALS = json.load(f)
+        stamp = _credentials_file_stamp()
+        if stamp is None or stamp == _CREDENTIALS_STAMP:
+            return
+        with open(CREDENTIALS_FILE, 'r') as f:
+            ACTIVE_CREDENTIALS = json.load(f)
+        _CREDENTIALS_STAMP = stamp
+        _rebuild_expiry_heap()
     except Exception as e:
         logger.warning(f"⚠️ Could not load credentials: {e}")
         ACTIVE_CREDENTIALS = {}
+        _CREDENTIALS_STAMP = None
 
 def save_credentials():
     """Save credentials to file"""
+    global _CREDENTIALS_STAMP
     try:
         with open(CREDENTIALS_FILE, 'w') as f:
             json.dump(ACTIVE_CREDENTIALS, f)
+        # What's on disk now matches memory, so the next load can skip it
+        _CREDENTIALS_STAMP = _credentials_file_stamp()
     except Exception as e:
         logger.warning(f"⚠️ Could not save credentials: {e}")
 
-def add_credential(username, password):
-    """Add a temporary credential"""
+def add_credential(username, password, persist=True):
+    """Add a temporary credential
+    
+    persist=False keeps it in memory only (LOCAL_CREDENTIALS) - for callers in
+    the same process as the server, which needs no file to see it.
+    """
     user_key = f"{username}:{password}"
-    ACTIVE_CREDENTIALS[user_key] = {
+    store = ACTIVE_CREDENTIALS if persist else LOCAL_CREDENTIALS
+    store[user_key] = {
         'created': time.time(),
         'used': False
     }
-    save_credentials()
+    if persist:
+        _schedule_expiry(user_key, store[user_key]['created'])
+        save_credentials()
     logger.info(f"🔑 Added SOCKS5 credential for user: {username}")
 
-def remove_credential(username, password):
+def remove_credential(username, password, persist=True):
     """Remove a specific credential (single-use cleanup)"""
     user_key = f"{username}:{password}"
-    if user_key in ACTIVE_CREDENTIALS:
-        del ACTIVE_CREDENTIALS[user_key]
-        save_credentials()
+    store = ACTIVE_CREDENTIALS if persist else LOCAL_CREDENTIALS
+    if store.pop(user_key, None) is not None:
+        if persist:
+            save_credentials()
         logger.info(f"🗑️ Removed single-use SOCKS5 credential for user: {username}")
         return True
     else:
         logger.debug(f"Credential not found for removal: {username}")
         return False
 
+def _schedule_expiry(key, created):
+    """Queue a file-backed credential for removal once it expires"""
+    with _EXPIRY_LOCK:
+        heapq.heappush(_EXPIRY_HEAP, (created + CREDENTIAL_TTL, key))
+
+def _rebuild_expiry_heap():
+    """Re-queue every credential after ACTIVE_CREDENTIALS is reloaded from the file"""
+    with _EXPIRY_LOCK:
+        _EXPIRY_HEAP[:] = [(data['created'] + CREDENTIAL_TTL, key) for key, data in ACTIVE_CREDENTIALS.items()]
+        heapq.heapify(_EXPIRY_HEAP)
+
 def cleanup_expired_credentials():
-    """Clean up expired credentials (safety cleanup for any orphaned credentials)"""
+    """Clean up expired credentials (safety cleanup for any orphaned credentials)
+    
+    Returns the time of the next expiry, or None if nothing is queued.
+    """
+    # Pick up credentials the CLI added since the last reload before saving over the file
+    load_credentials()
     current_time = time.time()
     expired_keys = []
     
-    for key, data in ACTIVE_CREDENTIALS.items():
-        # Reduce to 10 minutes since we now remove credentials immediately after use
-        if current_time - data['created'] > 600:  # 10 minutes (safety buffer)
-            expired_keys.append(key)
+    with _EXPIRY_LOCK:
+        while _EXPIRY_HEAP and _EXPIRY_HEAP[0][0] <= current_time:
+            expiry, key = heapq.heappop(_EXPIRY_HEAP)
+            data = ACTIVE_CREDENTIALS.get(key)
+            # Skip entries for credentials already removed or re-added since
+            if data is not None and data['created'] + CREDENTIAL_TTL == expiry:
+                del ACTIVE_CREDENTIALS[key]
+                expired_keys.append(key)
+        next_expiry = _EXPIRY_HEAP[0][0] if _EXPIRY_HEAP else None
     
     for key in expired_keys:
-        del ACTIVE_CREDENTIALS[key]
         logger.info(f"🧹 Removed orphaned SOCKS5 credential: {key.split(':')[0]}")
     
     if expired_keys:
         save_credentials()
+    return next_expiry
 
-def start_cleanup_thread():
-    """Start background thread to clean up expired credentials"""
-    def cleanup_loop():
-        while True:
-            time.sleep(300)  # Check every 5 minutes
-            cleanup_expired_credentials()
-    
-    cleanup_thread = threading.Thread(target=cleanup_loop)
-    cleanup_thread.daemon = True
-    cleanup_thread.start()
+async def cleanup_loop():
+    """Remove credentials as they expire, sleeping until the next expiry"""
+    while True:
+        next_expiry = cleanup_expired_credentials()
+        if next_expiry is None:
+            delay = CLEANUP_MAX_SLEEP
+        else:
+            delay = min(max(next_expiry - time.time(), 0), CLEANUP_MAX_SLEEP)
+        await asyncio.sleep(delay)
+
+def run_server_worker():
+    """Extra standalone server process (credential expiry runs in the main process)"""
+    load_credentials()
+    server = SOCKS5Server(host='0.0.0.0', port=3333)
+    try:
+        run_event_loop(server.start_server(run_cleanup=False))
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
     import sys
@@ -437,12 +566,20 @@ if __name__ == "__main__":
     else:
         # Start proxy server
         load_credentials()
-        start_cleanup_thread()
         
         logger.info("🚀 Starting CapSolver SOCKS5 proxy server on port 3333")
         
+        # Extra workers get their own event loop on the same port; only this
+        # process expires credentials, so the file has a single writer
+        workers = [multiprocessing.Process(target=run_server_worker, daemon=True)
+                   for _ in range(SERVER_WORKERS - 1)]
+        for worker in workers:
+            worker.start()
+        if workers:
+            logger.info(f"🚀 Started {len(workers)} extra SOCKS5 worker processes")
+        
         server = SOCKS5Server(host='0.0.0.0', port=3333)
         try:
-            asyncio.run(server.start_server())
+            run_event_loop(server.start_server())
         except KeyboardInterrupt:
             logger.info("🛑 SOCKS5 proxy server stopped")
\ No newline at end of file
@@ -3,21 +3,93 @@ Text-Based State Detection for Newspaper Renewals
 Based on real-world screenshot analysis of success/failure states
 """
 
+import threading
+from collections import defaultdict
 from typing import Tuple, Optional
 from selenium.webdriver.common.by import By
 from error_handling import StandardizedLogger
 
 logger = StandardizedLogger(__name__)
 
+# CAPTCHA indicators, joined so one find_elements call checks them all
+CAPTCHA_SELECTORS_CSS = ", ".join((
+    "iframe[src*='captcha']",
+    "iframe[title*='CAPTCHA']",
+    "iframe[title*='DataDome']",
+    "[class*='captcha']",
+    "[id*='captcha']"
+))
+
+# Page fingerprint, plus the lowercased visible body text and whether the
+# CAPTCHA selectors in arguments[1] match, unless the fingerprint matches
+# arguments[0] - all in one round trip. The fingerprint is computed from what
+# the page already exposes (URL, readyState, CAPTCHA match, text length and
+# hash), so nothing is left behind on the page for its scripts to find
+JS_PAGE_SNAPSHOT = """
+var text = document.body ? (document.body.innerText || '').toLowerCase() : '';
+var captcha = !!document.querySelector(arguments[1]);
+var hash = 0;
+for (var i = 0; i < text.length; i++) {
+    hash = (hash * 31 + text.charCodeAt(i)) | 0;
+}
+var fingerprint = [location.href, document.readyState, captcha, text.length, hash].join('|');
+if (fingerprint === arguments[0]) {
+    return [fingerprint, null, null];
+}
+return [fingerprint, text, captcha];
+"""
+
+# Authentication errors, checked in this order (substring search is faster
+# than one regex alternation over these literals)
+AUTH_ERRORS = (
+    "incorrect password",
+    "invalid email",
+    "wrong username",
+    "invalid username",
+    "incorrect email",
+    "wrong password",
+    "authentication failed",
+    "login failed"
+)
+
+
+# Success patterns per newspaper, checked in order: (phrases that must all be
+# present, state, message) - very specific to avoid false positives
+SUCCESS_PATTERNS = {
+    'nyt': (
+        (("your pass is active and will expire on",), "SUCCESS", "NYT pass active with expiration"),
+        (("you've claimed your nytimes pass!",), "SUCCESS", "NYT pass claimed successfully"),
+        # "already associated" means the account has a direct subscription
+        (("already associated with an active new york times subscription",),
+         "SUCCESS_WITH_WARNING", "NYT account has direct subscription (no library pass needed)")
+    ),
+    'wsj': (
+        # Require BOTH parts for accuracy
+        (("welcome back", "looks like you already have a subscription"),
+         "SUCCESS", "WSJ pass active from previous claim"),
+    )
+}
+
+class _DetectionCounters(threading.local):
+    """Per-thread detection counters, so concurrent renewals don't share state"""
+    
+    def __init__(self):
+        # Track CAPTCHA attempts per context (missing contexts count as 0)
+        self.captcha_attempts = defaultdict(int)
+        
+        # Track library portal visits per (driver session, newspaper), for stuck detection
+        self.library_portal_counts = defaultdict(int)
+        
+        # (driver session, newspaper, context, page fingerprint) of the last
+        # check that found nothing, so an unchanged page isn't checked again
+        self.last_continue = None
+
 
 class StateDetector:
     """Detects renewal states based on empirical patterns from actual renewals"""
     
-    # Track CAPTCHA attempts per context
-    captcha_attempts = {}
-    
-    # Track library portal visits (for stuck detection)
-    library_portal_count = 0
+    # Counters for the renewal running on the current thread
+    _counters = _DetectionCounters()
     
     @staticmethod
     def check_state(driver, newspaper_type: str, context: str = "") -> Tuple[str, Optional[str]]:
@@ -33,73 +105,89 @@ class StateDetector:
             - CONTINUE: No definitive state, continue processing
         """
         try:
-            # Get page text
-            page_text = driver.find_element(By.TAG_NAME, 'body').text.lower()
-            current_url = driver.current_url.lower()
+            counters = StateDetector._counters
+            key = (getattr(driver, 'session_id', None), newspaper_type, context)
+            known = counters.last_continue[3] if counters.last_continue and counters.last_continue[:3] == key else None
             
-            # Check SUCCESS states first (most specific patterns)
-            success_result = StateDetector._check_success_patterns(page_text, newspaper_type)
-            if success_result[0] != "CONTINUE":
-                return success_result
+            # Get page text (lowercased) - skipped if the page hasn't changed since
+            # it last gave CONTINUE
+            fingerprint, page_text, captcha_present = StateDetector._page_snapshot(driver, known)
+            if known and fingerprint == known:
+                return ("CONTINUE", None)
+            counters.last_continue = None
             
-            # Check FAILURE states (conservative - only definitive failures)
-            failure_result = StateDetector._check_failure_patterns(page_text, current_url, newspaper_type)
-            if failure_result[0] == "FAILURE":
-                return failure_result
+            portal_key = key[:2]
+            result = StateDetector._check_page(driver, page_text, newspaper_type, context,
+                                               portal_key, captcha_present)
             
-            # Check for CAPTCHA presence
-            captcha_result = StateDetector._check_captcha_presence(driver, context)
-            if captcha_result[0] == "CAPTCHA_PRESENT":
-                return captcha_result
+            if result[0] in ("SUCCESS", "SUCCESS_WITH_WARNING"):
+                # Got past the portal, so earlier visits no longer count
+                StateDetector.reset_library_counter(portal_key[0])
             
-            # No definitive state found
-            return ("CONTINUE", None)
+            # Only a CONTINUE is reused - and not while the library portal count is
+            # rising, since that counts repeated checks of an unchanged page
+            if result[0] == "CONTINUE" and fingerprint and portal_key not in counters.library_portal_counts:
+                counters.last_continue = key + (fingerprint,)
+            return result
             
         except Exception as e:
             logger.error(f"Error in state detection: {str(e)}")
             return ("CONTINUE", None)
     
     @staticmethod
-    def _check_success_patterns(page_text: str, newspaper_type: str) -> Tuple[str, Optional[str]]:
-        """Check for success patterns based on empirical data"""
+    def _check_page(driver, page_text: str, newspaper_type: str, context: str,
+                    portal_key: Tuple = None, captcha_present: Optional[bool] = None) -> Tuple[str, Optional[str]]:
+        """Run the success, failure and CAPTCHA checks against the page"""
+        # Check SUCCESS states first (most specific patterns)
+        success_result = StateDetector._check_success_patterns(page_text, newspaper_type)
+        if success_result[0] != "CONTINUE":
+            return success_result
         
-        if newspaper_type == 'nyt':
-            # NYT SUCCESS patterns (very specific to avoid false positives)
-            if "your pass is active and will expire on" in page_text:
-                return ("SUCCESS", "NYT pass active with expiration")
-            
-            if "you've claimed your nytimes pass!" in page_text:
-                return ("SUCCESS", "NYT pass claimed successfully")
-            
-            # NYT SUCCESS_WITH_WARNING patterns
-            # Check for "already associated" which means account has direct subscription
-            if "already associated with an active new york times subscription" in page_text:
-                return ("SUCCESS_WITH_WARNING", "NYT account has direct subscription (no library pass needed)")
+        # Check FAILURE states (conservative - only definitive failures)
+        failure_result = StateDetector._check_failure_patterns(page_text, newspaper_type, portal_key)
+        if failure_result[0] == "FAILURE":
+            return failure_result
         
-        elif newspaper_type == 'wsj':
-            # WSJ SUCCESS patterns (require BOTH parts for accuracy)
-            if "welcome back" in page_text and "looks like you already have a subscription" in page_text:
-                return ("SUCCESS", "WSJ pass active from previous claim")
+        # Check for CAPTCHA presence
+        captcha_result = StateDetector._check_captcha_presence(driver, context, captcha_present)
+        if captcha_result[0] == "CAPTCHA_PRESENT":
+            return captcha_result
         
+        # No definitive state found
         return ("CONTINUE", None)
     
     @staticmethod
-    def _check_failure_patterns(page_text: str, current_url: str, newspaper_type: str) -> Tuple[str, Optional[str]]:
+    def _page_snapshot(driver, known_fingerprint: Optional[str]) -> Tuple:
+        """(fingerprint, lowercased text, CAPTCHA present), with only the fingerprint when known"""
+        try:
+            fingerprint, page_text, captcha_present = driver.execute_script(
+                JS_PAGE_SNAPSHOT, known_fingerprint, CAPTCHA_SELECTORS_CSS)
+            if fingerprint == known_fingerprint:
+                return fingerprint, None, None
+            return fingerprint, page_text or '', bool(captcha_present)
+        except Exception as e:
+            # No fingerprint from the fallback, so nothing is reused
+            logger.debug(f"Page snapshot script failed, reading body element: {str(e)}")
+        
+        page_text = driver.find_element(By.TAG_NAME, 'body').text.lower()
+        return None, page_text, None
+    
+    @staticmethod
+    def _check_success_patterns(page_text: str, newspaper_type: str) -> Tuple[str, Optional[str]]:
+        """Check for success patterns based on empirical data"""
+        for phrases, state, message in SUCCESS_PATTERNS.get(newspaper_type, ()):
+            if all(phrase in page_text for phrase in phrases):
+                return (state, message)
+        
+        return ("CONTINUE", None)
+    
+    @staticmethod
+    def _check_failure_patterns(page_text: str, newspaper_type: str,
+                                portal_key: Tuple = None) -> Tuple[str, Optional[str]]:
         """Check for failure patterns - conservative to avoid false positives"""
         
         # Authentication errors (very specific)
-        auth_errors = [
-            "incorrect password",
-            "invalid email", 
-            "wrong username",
-            "invalid username",
-            "incorrect email",
-            "wrong password",
-            "authentication failed",
-            "login failed"
-        ]
-        
-        for error in auth_errors:
+        for error in AUTH_ERRORS:
             if error in page_text:
                 return ("FAILURE", f"Authentication error: {error}")
         
@@ -116,73 +204,69 @@ class StateDetector:
         # Check if stuck at library portal (WSJ specific pattern)
         if newspaper_type == 'wsj':
             if "public library" in page_text and "visit the wall street journal" in page_text:
-                StateDetector.library_portal_count += 1
+                # Counted per driver session, so checks for other sessions or
+                # newspapers don't reset this one's progress
+                portal_counts = StateDetector._counters.library_portal_counts
+                portal_key = portal_key or (None, newspaper_type)
+                portal_counts[portal_key] += 1
                 
-                if StateDetector.library_portal_count >= 3:
+                if portal_counts[portal_key] >= 3:
                     return ("FAILURE", "Stuck at library portal after 3 attempts")
                 else:
-                    logger.info(f"At library portal (attempt {StateDetector.library_portal_count}/3)")
-        else:
-            # Reset counter if not at library portal
-            StateDetector.library_portal_count = 0
+                    logger.info(f"At library portal (attempt {portal_counts[portal_key]}/3)")
         
         return ("CONTINUE", None)
     
     @staticmethod
-    def _check_captcha_presence(driver, context: str) -> Tuple[str, Optional[str]]:
+    def _check_captcha_presence(driver, context: str, captcha_present: Optional[bool] = None) -> Tuple[str, Optional[str]]:
         """Check for CAPTCHA presence - not a failure unless we can't solve it"""
         
-        # CAPTCHA indicators
-        captcha_selectors = [
-            "iframe[src*='captcha']",
-            "iframe[title*='CAPTCHA']",
-            "iframe[title*='DataDome']",
-            "[class*='captcha']",
-            "[id*='captcha']"
-        ]
-        
-        captcha_present = False
-        for selector in captcha_selectors:
+        # Use the page snapshot's answer, or one round trip for all CAPTCHA indicators
+        if captcha_present is None:
+            captcha_present = False
             try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                elements = driver.find_elements(By.CSS_SELECTOR, CAPTCHA_SELECTORS_CSS)
                 if elements:
                     captcha_present = True
-                    logger.debug(f"CAPTCHA detected via selector: {selector}")
-                    break
+                    logger.debug(f"CAPTCHA detected via selectors ({len(elements)} matching elements)")
             except:
-                continue
+                pass
         
         if captcha_present:
             # Track attempts per context
-            if context not in StateDetector.captcha_attempts:
-                StateDetector.captcha_attempts[context] = 0
-            
-            StateDetector.captcha_attempts[context] += 1
+            attempts = StateDetector._counters.captcha_attempts
+            attempts[context] += 1
             
             # Only fail after multiple attempts at same location
-            if StateDetector.captcha_attempts[context] > 3:
+            if attempts[context] > 3:
                 return ("FAILURE", f"CAPTCHA blocking progress after 3 attempts at {context}")
             
-            return ("CAPTCHA_PRESENT", f"CAPTCHA detected (attempt {StateDetector.captcha_attempts[context]}/3)")
+            return ("CAPTCHA_PRESENT", f"CAPTCHA detected (attempt {attempts[context]}/3)")
         
         # Reset counter if no CAPTCHA
-        if context in StateDetector.captcha_attempts:
-            StateDetector.captcha_attempts[context] = 0
+        StateDetector._counters.captcha_attempts.pop(context, None)
         
         return ("CONTINUE", None)
     
     @staticmethod
     def reset_captcha_counter(context: str):
         """Reset CAPTCHA counter for a specific context (e.g., after successful solve)"""
-        if context in StateDetector.captcha_attempts:
-            StateDetector.captcha_attempts[context] = 0
+        if StateDetector._counters.captcha_attempts.pop(context, None) is not None:
             logger.debug(f"Reset CAPTCHA counter for context: {context}")
     
+    @staticmethod
+    def reset_library_counter(session_id):
+        """Reset library portal counters for a driver session (e.g., after a success)"""
+        portal_counts = StateDetector._counters.library_portal_counts
+        for key in [key for key in portal_counts if key[0] == session_id]:
+            del portal_counts[key]
+    
     @staticmethod
     def reset_all_counters():
         """Reset all tracking counters (useful between renewal attempts)"""
-        StateDetector.captcha_attempts = {}
-        StateDetector.library_portal_count = 0
+        StateDetector._counters.captcha_attempts.clear()
+        StateDetector._counters.library_portal_counts.clear()
+        StateDetector._counters.last_continue = None
         logger.debug("Reset all state detection counters")
 
 
@@ -2,29 +2,49 @@
 WSGI entry point for production deployment
 """
 import os
+import atexit
+import queue
 import logging
 import logging.handlers
+from error_handling import RepeatedMessageFilter, SizeTrackingRotatingFileHandler
 
 # Configure logging BEFORE importing app
 logs_dir = os.path.join(os.path.dirname(__file__), 'data', 'logs')
 os.makedirs(logs_dir, exist_ok=True)
 
-# Configure root logger
+# Output handlers, fed from a queue by a background listener so request
+# threads never wait on console or disk writes (or log rotation)
+log_handlers = [
+    # Console handler
+    logging.StreamHandler(),
+    # File handler with rotation (size tracked in memory, not checked per record)
+    SizeTrackingRotatingFileHandler(
+        os.path.join(logs_dir, 'newspaparr.log'),
+        maxBytes=10*1024*1024,  # 10MB
+        backupCount=5
+    )
+]
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+
+queue_handler = logging.handlers.QueueHandler(log_queue)
+
+# Configure root logger - records are formatted when queued, so the output
+# handlers write the finished message as-is
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        # Console handler
-        logging.StreamHandler(),
-        # File handler with rotation
-        logging.handlers.RotatingFileHandler(
-            os.path.join(logs_dir, 'newspaparr.log'),
-            maxBytes=10*1024*1024,  # 10MB
-            backupCount=5
-        )
-    ],
+    handlers=[queue_handler],
     force=True  # Force reconfiguration even if logging is already configured
 )
+log_listener.start()
+# Flush anything still queued on shutdown
+atexit.register(log_listener.stop)
+
+# Identical routine messages repeated within a few seconds are dropped, but only
+# for the proxy relay and state polling loggers - everything else logs as-is
+for noisy_logger in ('socks5_proxy', 'on_demand_proxy', 'state_detector'):
+    logging.getLogger(noisy_logger).addFilter(RepeatedMessageFilter(interval=5.0))
 
 # Log that we've initialized
 logger = logging.getLogger(__name__)